@@ -0,0 +1,257 @@
+import os 
+import struct 
+import time 
+import zipfile 
+import zlib 
+from concurrent .futures import ThreadPoolExecutor 
+
+_LOCAL =struct .Struct ('<4sHHHHHIIIHH')
+_CENTRAL =struct .Struct ('<4sHHHHHHIIIHHHHHII')
+_END =struct .Struct ('<4sHHHHIIH')
+_LIMIT =0xFFFFFFFF 
+_COPY_CHUNK =1024 *1024 
+# already-compressed payloads: deflating them again only burns cpu
+STORE_EXTENSIONS =('.png','.jpg','.jpeg','.gif','.car','.mp3','.m4a','.aac','.mp4','.m4v','.mov','.zip','.gz','.ipa')
+# bigger files are deflated streaming in the writer instead of whole in memory on the pool
+_BIG_FILE =32 *1024 *1024 
+# compressed members waiting to be written, bounded by their input size
+_WINDOW_BYTES =128 *1024 *1024 
+
+
+def _dos_datetime (date_time ):
+    y ,mo ,d ,h ,mi ,s =date_time 
+    if y <1980 :
+        y ,mo ,d ,h ,mi ,s =1980 ,1 ,1 ,0 ,0 ,0 
+    return (h <<11 )|(mi <<5 )|(s //2 ),((y -1980 )<<9 )|(mo <<5 )|d 
+
+
+class RawZipWriter :
+    """
+    Minimal zip writer for members whose compressed bytes are already known.
+    Only what Info-ZIP unzip on the device needs: stored/deflated members, no zip64.
+    """
+
+    def __init__ (self ,path ):
+        self .f =open (path ,'wb')
+        self .entries =[]
+
+    def add_raw (self ,name ,method ,crc ,compress_size ,file_size ,date_time ,external_attr ,chunks ,system =3 ):
+        offset =self .f .tell ()
+        if offset >_LIMIT or compress_size >_LIMIT or file_size >_LIMIT :
+            raise ValueError ("archive too large for a plain zip (zip64 needed)")
+        nb =name .encode ('utf-8')
+        # bit 11: utf-8 names
+        flags =0 if nb .isascii ()else 0x800 
+        t ,d =_dos_datetime (date_time )
+        self .f .write (_LOCAL .pack (b'PK\x03\x04',20 ,flags ,method ,t ,d ,crc ,compress_size ,file_size ,len (nb ),0 ))
+        self .f .write (nb )
+        written =0 
+        for chunk in chunks :
+            self .f .write (chunk )
+            written +=len (chunk )
+        if written !=compress_size :
+            raise ValueError (f"short member data for {name}")
+        self .entries .append ((nb ,flags ,method ,t ,d ,crc ,compress_size ,file_size ,external_attr ,offset ,system ))
+
+    def add_stream (self ,name ,src ,level ,date_time ,external_attr ,system =3 ):
+        """Deflate (level > 0) or store src while writing, then patch sizes into the local header."""
+        offset =self .f .tell ()
+        nb =name .encode ('utf-8')
+        flags =0 if nb .isascii ()else 0x800 
+        method =zipfile .ZIP_DEFLATED if level >0 else zipfile .ZIP_STORED 
+        t ,d =_dos_datetime (date_time )
+        self .f .write (_LOCAL .pack (b'PK\x03\x04',20 ,flags ,method ,t ,d ,0 ,0 ,0 ,len (nb ),0 ))
+        self .f .write (nb )
+        co =zlib .compressobj (level ,zlib .DEFLATED ,-15 )if level >0 else None 
+        crc =0 
+        usize =0 
+        csize =0 
+        while True :
+            chunk =src .read (_COPY_CHUNK )
+            if not chunk :
+                break 
+            crc =zlib .crc32 (chunk ,crc )
+            usize +=len (chunk )
+            out =co .compress (chunk )if co else chunk 
+            self .f .write (out )
+            csize +=len (out )
+        if co :
+            out =co .flush ()
+            self .f .write (out )
+            csize +=len (out )
+        if offset >_LIMIT or csize >_LIMIT or usize >_LIMIT :
+            raise ValueError ("archive too large for a plain zip (zip64 needed)")
+        end =self .f .tell ()
+        self .f .seek (offset )
+        self .f .write (_LOCAL .pack (b'PK\x03\x04',20 ,flags ,method ,t ,d ,crc ,csize ,usize ,len (nb ),0 ))
+        self .f .seek (end )
+        self .entries .append ((nb ,flags ,method ,t ,d ,crc ,csize ,usize ,external_attr ,offset ,system ))
+
+    def close (self ):
+        start =self .f .tell ()
+        for nb ,flags ,method ,t ,d ,crc ,csize ,usize ,attr ,offset ,system in self .entries :
+        # 'made by' decides how unzip reads external_attr: 3 = unix mode bits, 0 = dos attributes
+            self .f .write (_CENTRAL .pack (b'PK\x01\x02',(system <<8 )|20 ,20 ,flags ,method ,t ,d ,crc ,csize ,usize ,
+            len (nb ),0 ,0 ,0 ,0 ,attr ,offset ))
+            self .f .write (nb )
+        size =self .f .tell ()-start 
+        if len (self .entries )>0xFFFF or start >_LIMIT :
+            self .f .close ()
+            raise ValueError ("archive too large for a plain zip (zip64 needed)")
+        self .f .write (_END .pack (b'PK\x05\x06',0 ,0 ,len (self .entries ),len (self .entries ),size ,start ,0 ))
+        self .f .close ()
+
+    def abort (self ):
+        try :
+            self .f .close ()
+        except Exception :
+            pass 
+
+
+def _raw_member_chunks (src ,info ):
+    """Yield the still-compressed bytes of a member straight from the archive file."""
+    src .seek (info .header_offset )
+    hdr =src .read (30 )
+    if len (hdr )!=30 or hdr [:4 ]!=b'PK\x03\x04':
+        raise ValueError (f"bad local header for {info.filename}")
+    nlen ,xlen =struct .unpack ('<HH',hdr [26 :30 ])
+    src .seek (info .header_offset +30 +nlen +xlen )
+    left =info .compress_size 
+    while left >0 :
+        chunk =src .read (min (_COPY_CHUNK ,left ))
+        if not chunk :
+            raise ValueError (f"truncated member {info.filename}")
+        left -=len (chunk )
+        yield chunk 
+
+
+def repack_app_from_ipa (ipa_path ,app_prefix ,out_path ):
+    """
+    Write the members under app_prefix (e.g. 'Payload/X.app/') to a new zip rooted at 'X.app/',
+    copying the compressed streams verbatim: no inflate, no deflate.
+    Raises ValueError when a member can't be copied raw (encrypted, unusual method, zip64).
+    Returns (members, bytes copied).
+    """
+    strip =app_prefix .rstrip ('/').rsplit ('/',1 )[0 ]+'/'
+    count =0 
+    copied =0 
+    with zipfile .ZipFile (ipa_path ,'r')as z ,open (ipa_path ,'rb')as src :
+        members =[i for i in z .infolist ()if i .filename .startswith (app_prefix )]
+        for info in members :
+            if info .flag_bits &0x1 :
+                raise ValueError (f"{info.filename} is encrypted")
+            if info .compress_type not in (zipfile .ZIP_STORED ,zipfile .ZIP_DEFLATED ):
+                raise ValueError (f"{info.filename} uses compression method {info.compress_type}")
+        out =RawZipWriter (out_path )
+        try :
+            for info in members :
+                out .add_raw (info .filename [len (strip ):],info .compress_type ,info .CRC ,info .compress_size ,
+                info .file_size ,info .date_time ,info .external_attr ,_raw_member_chunks (src ,info ),
+                system =info .create_system )
+                count +=1 
+                copied +=info .compress_size 
+            out .close ()
+        except Exception :
+            out .abort ()
+            raise 
+    return count ,copied 
+
+
+def _compress_member (path ,level ,store ):
+    with open (path ,'rb')as f :
+        data =f .read ()
+    crc =zlib .crc32 (data )
+    if not store and level >0 :
+        co =zlib .compressobj (level ,zlib .DEFLATED ,-15 )
+        comp =co .compress (data )+co .flush ()
+        if len (comp )<len (data ):
+            return zipfile .ZIP_DEFLATED ,crc ,comp ,len (data )
+    return zipfile .ZIP_STORED ,crc ,data ,len (data )
+
+
+def pack_app_dir (app_dir ,out_path ,level =6 ,workers =None ,on_warn =None ):
+    """
+    Zip app_dir under its own folder name (X.app/...) like the old single-threaded builder,
+    but deflate members concurrently on a thread pool (zlib releases the GIL) and write them in order.
+    Files in STORE_EXTENSIONS are stored. Returns (members, input bytes, output bytes).
+    """
+    app_dir =app_dir .rstrip (os .sep )
+    root_len =len (os .path .dirname (app_dir ))
+    system =0 if os .name =='nt'else 3 
+    items =[]
+    for base ,dirs ,files in os .walk (app_dir ):
+        rel_dir =base [root_len :].lstrip (os .sep ).replace (os .sep ,'/')+'/'
+        items .append ((rel_dir ,base ,True ))
+        for f in files :
+            items .append ((rel_dir +f ,os .path .join (base ,f ),False ))
+    workers =workers or os .cpu_count ()or 2 
+    window =workers *4 
+    totals ={'count':0 ,'bytes':0 }
+
+    def prepare (item ):
+        arcname ,path ,is_dir =item 
+        if is_dir :
+            return None 
+        try :
+            return os .stat (path )
+        except OSError as ex :
+            return ex 
+
+    out =RawZipWriter (out_path )
+    try :
+        with ThreadPoolExecutor (max_workers =workers )as pool :
+            pending =[]
+            inflight =0 
+            for item in items :
+                job =prepare (item )
+                # big files are streamed at write time and never held in memory
+                small =isinstance (job ,os .stat_result )and job .st_size <=_BIG_FILE 
+                cost =job .st_size if small else 0 
+                # keep a bounded window of compressed members in memory, by count and by bytes
+                while pending and (len (pending )>=window or inflight +cost >_WINDOW_BYTES ):
+                    inflight -=pending [0 ][2 ]
+                    _write_packed (out ,pending .pop (0 )[:2 ],level ,system ,totals ,on_warn )
+                if small :
+                    store =item [0 ].lower ().endswith (STORE_EXTENSIONS )
+                    job =(job ,pool .submit (_compress_member ,item [1 ],level ,store ))
+                pending .append ((item ,job ,cost ))
+                inflight +=cost 
+            while pending :
+                _write_packed (out ,pending .pop (0 )[:2 ],level ,system ,totals ,on_warn )
+        out .close ()
+    except Exception :
+        out .abort ()
+        raise 
+    return totals ['count'],totals ['bytes'],os .path .getsize (out_path )
+
+
+def _write_packed (out ,pending ,level ,system ,totals ,on_warn ):
+    (arcname ,path ,is_dir ),job =pending 
+    try :
+        if is_dir :
+            st =os .stat (path )
+            out .add_raw (arcname ,zipfile .ZIP_STORED ,0 ,0 ,0 ,time .localtime (st .st_mtime )[:6 ],
+            ((st .st_mode &0xFFFF )<<16 )|0x10 ,[],system =system )
+            totals ['count']+=1 
+            return 
+        if isinstance (job ,Exception ):
+            raise job 
+        if isinstance (job ,os .stat_result ):
+            store =arcname .lower ().endswith (STORE_EXTENSIONS )
+            with open (path ,'rb')as src :
+                out .add_stream (arcname ,src ,0 if store else level ,time .localtime (job .st_mtime )[:6 ],
+                (job .st_mode &0xFFFF )<<16 ,system =system )
+            size =job .st_size 
+        else :
+            st ,fut =job 
+            method ,crc ,data ,size =fut .result ()
+            out .add_raw (arcname ,method ,crc ,len (data ),size ,time .localtime (st .st_mtime )[:6 ],
+            (st .st_mode &0xFFFF )<<16 ,[data ]if data else [],system =system )
+        totals ['count']+=1 
+        totals ['bytes']+=size 
+    except ValueError :
+    # zip64 limits: the archive can't be finished
+        raise 
+    except Exception as ex :
+        if on_warn :
+            on_warn (f"skip {path}: {ex}")
@@ -1,18 +1,229 @@
+import collections 
+import hashlib 
+import json 
 import os 
+import plistlib 
+import queue 
 import re 
+import shutil 
 import tempfile 
 import threading 
+from concurrent .futures import ThreadPoolExecutor 
 import tkinter as tk 
 from tkinter import ttk 
 import stat 
 
+import cgbi 
+from sftp_transfer import _sh_quote 
+from ssh_pool import run_command 
+from ui_dispatch import UIDispatcher 
+
+# one exec for the whole app list: per bundle an A line (dir, Info.plist mtime and size) and
+# P lines for the pngs in the bundle root; icon names come from the Info.plist, read locally
+_INVENTORY_SH =(
+"R=/var/jb/Applications; [ -d \"$R\" ] || R=/Applications; echo \"R\t$R\"; "
+"for d in \"$R\"/*.app; do [ -d \"$d\" ] || continue; p=\"$d/Info.plist\"; "
+"m=$(stat -c '%Y %s' \"$p\" 2>/dev/null || stat -f '%m %z' \"$p\" 2>/dev/null || echo '0 0'); "
+"printf 'A\t%s\t%s\t%s\n' \"${d##*/}\" ${m% *} ${m#* }; "
+"for f in \"$d\"/*.png; do [ -f \"$f\" ] && printf 'P\t%s\n' \"${f##*/}\"; done; "
+"done"
+)
+
+# dropbear refuses exec commands over 9000 bytes (MAX_CMD_LEN): Info.plist reads go in batches below that
+_PLIST_BATCH_BYTES =7000 
+
+
+class IconCache :
+    """
+    Thumbnails on disk keyed by device + app path + Info.plist mtime/size, so an unchanged bundle is never
+    fetched again. Least recently used files go once the directory grows past max_bytes.
+    """
+
+    def __init__ (self ,cache_dir ,size =128 ,max_bytes =32 *1024 *1024 ):
+        self .cache_dir =cache_dir 
+        self .size =size 
+        self .max_bytes =max_bytes 
+        self ._lock =threading .Lock ()
+        self ._names =None 
+        # bytes of .png in cache_dir, from one listing then kept up to date by put; None until listed
+        self ._total =None 
+
+    @staticmethod 
+    def key (device ,app_path ,plist_mtime ,plist_size ):
+        return hashlib .sha1 (f"{device}|{app_path}|{plist_mtime}|{plist_size}".encode ('utf-8')).hexdigest ()
+
+    def _path (self ,key ):
+        return os .path .join (self .cache_dir ,key +'.png')
+
+    def get (self ,key ):
+        path =self ._path (key )
+        try :
+        # mtime doubles as last use for the lru
+            os .utime (path ,None )
+            return path 
+        except OSError :
+            return None 
+
+    def put (self ,key ,src ):
+        """Store a thumbnail of src; returns the cached path, or None when src can't be read."""
+        path =self ._path (key )
+        tmp =path +'.tmp'
+        try :
+            os .makedirs (self .cache_dir ,exist_ok =True )
+            try :
+                old =os .path .getsize (path )
+            except OSError :
+                old =0 
+            try :
+                from PIL import Image # type: ignore
+                im =Image .open (src ).convert ('RGBA')
+                im .thumbnail ((self .size ,self .size ),Image .LANCZOS )
+                im .save (tmp ,'PNG')
+            except ImportError :
+            # no pil: keep the original, it is scaled when shown
+                shutil .copyfile (src ,tmp )
+            os .replace (tmp ,path )
+            grown =os .path .getsize (path )-old 
+        except Exception :
+            try :
+                os .remove (tmp )
+            except OSError :
+                pass 
+            return None 
+        with self ._lock :
+            if self ._total is not None :
+                self ._total +=grown 
+            if self ._total is None or self ._total >self .max_bytes :
+                self ._evict ()
+        return path 
+
+    def _names_path (self ):
+        return os .path .join (self .cache_dir ,'names.json')
+
+    def name (self ,key ):
+        """Icon file name resolved for key earlier ('' for none), or None when unknown."""
+        with self ._lock :
+            if self ._names is None :
+                try :
+                    with open (self ._names_path (),'r',encoding ='utf-8')as f :
+                        self ._names =dict (json .load (f ))
+                except Exception :
+                    self ._names ={}
+            return self ._names .get (key )
+
+    def set_names (self ,names ,max_entries =2000 ):
+        """Remember resolved icon names ({key: name}), so a refresh never reads the Info.plist again."""
+        self .name ('')
+        with self ._lock :
+            for key ,value in names .items ():
+                self ._names .pop (key ,None )
+                self ._names [key ]=value or ''
+            for old in list (self ._names )[:-max_entries ]:
+                del self ._names [old ]
+            try :
+                os .makedirs (self .cache_dir ,exist_ok =True )
+                with open (self ._names_path (),'w',encoding ='utf-8')as f :
+                    json .dump (self ._names ,f )
+            except Exception :
+                pass 
+
+    def _evict (self ):
+    # with _lock held: the only full listing, once at first and then whenever the total runs over
+        try :
+            files =[]
+            for name in os .listdir (self .cache_dir ):
+                if not name .endswith ('.png'):
+                    continue 
+                full =os .path .join (self .cache_dir ,name )
+                st =os .stat (full )
+                files .append ((st .st_mtime ,st .st_size ,full ))
+        except OSError :
+            self ._total =None 
+            return 
+        total =sum (f [1 ]for f in files )
+        # down to 3/4 when over, so the next listing is a quarter of the cache away
+        keep =self .max_bytes if total <=self .max_bytes else self .max_bytes *3 //4 
+        for _ ,size ,full in sorted (files ):
+            if total <=keep :
+                break 
+            try :
+                os .remove (full )
+                total -=size 
+            except OSError :
+                pass 
+        self ._total =total 
+
+
+def icon_names (info ):
+    """Icon names declared in an Info.plist dict: CFBundleIcons(~ipad), CFBundleIconFiles, CFBundleIconFile."""
+    names =[]
+
+    def add (value ):
+        if isinstance (value ,str )and value :
+            names .append (value )
+        elif isinstance (value ,(list ,tuple )):
+            for v in value :
+                add (v )
+    for key in ('CFBundleIcons','CFBundleIcons~ipad'):
+        icons =info .get (key )
+        primary =icons .get ('CFBundlePrimaryIcon')if isinstance (icons ,dict )else None 
+        if isinstance (primary ,dict ):
+            add (primary .get ('CFBundleIconFiles'))
+            add (primary .get ('CFBundleIconName'))
+        else :
+            add (primary )
+    add (info .get ('CFBundleIconFiles'))
+    add (info .get ('CFBundleIconFile'))
+    return list (dict .fromkeys (names ))
+
+
+def _icon_base (name ):
+# 'AppIcon60x60@2x~ipad.png' -> 'appicon60x60'
+    base =name .lower ()
+    if base .endswith ('.png'):
+        base =base [:-4 ]
+    base =re .sub (r'~(ipad|iphone)$','',base )
+    return re .sub (r'@\dx$','',base )
+
+
+def _icon_pixels (name ):
+    """Rough edge length in pixels from the file name: the size in it (57 when absent) times the @Nx scale."""
+    low =name .lower ()
+    scale =re .search (r'@(\d)x',low )
+    nums =[int (n )for n in re .findall (r'\d+',re .sub (r'@\dx','',low ))]
+    size =max (nums )if nums else (29 if 'small'in low else 57 )
+    return size *(int (scale .group (1 ))if scale else 1 )
+
+
+def parse_inventory (text ):
+    """(applications dir, [app record dicts]) from the inventory script output."""
+    root =None 
+    apps =[]
+    for line in text .splitlines ():
+        parts =line .split ('\t')
+        kind =parts [0 ]
+        if kind =='R'and len (parts )>1 :
+            root =parts [1 ]
+        elif kind =='A'and len (parts )>=4 :
+            try :
+                mtime ,size =int (parts [2 ]),int (parts [3 ])
+            except ValueError :
+                mtime ,size =0 ,0 
+            apps .append ({'name':parts [1 ],'plist_mtime':mtime ,'plist_size':size ,'declared':[],'pngs':[]})
+        elif kind =='P'and len (parts )>1 and apps :
+            apps [-1 ]['pngs'].append (parts [1 ])
+    return root ,apps 
+
+
 class ApplicationsFrame (ttk .Frame ):
     """
-    Lists apps from /Applications or /var/jb/Applications on the connected device.
-    Shows app folder names (e.g., FaceTime.app) with icons picked from common filenames in the app bundle.
-    Icons checked in order: icon_144.png, icon_57.png, icon_72.png, icon_114.png. Fallback to local defapp.png.
+    Lists apps from /Applications or /var/jb/Applications on the connected device by folder name (e.g. FaceTime.app).
+    One shell exec inventories every bundle (Info.plist mtime/size, root pngs); the icon is resolved
+    from the Info.plist's CFBundleIcons/CFBundleIconFiles/CFBundleIconFile and only that file is downloaded.
+    ICON_CANDIDATES are the last resort for bundles that declare nothing. Fallback to local defapp.png.
 
-    Expects get_connection callable returning an active Paramiko SSHClient.
+    Expects get_connection callable returning an active client (the pooled one shared with the other tabs),
+    and optionally the app's ui_dispatch.UIDispatcher. Thumbnails persist in cache_dir (~/.iSync/icons).
     """
 
     ICON_CANDIDATES =[
@@ -26,15 +237,23 @@ class ApplicationsFrame (ttk .Frame ):
     "icon_57.png",
     ]
 
-    def __init__ (self ,parent ,get_connection ):
+    # concurrent sftp icon downloads, and threads decoding/resizing them off the ui thread
+    FETCH_WORKERS =4 
+    DECODE_WORKERS =2 
+
+    def __init__ (self ,parent ,get_connection ,dispatcher =None ,cache_dir =None ):
         super ().__init__ (parent )
         self .get_connection =get_connection 
+        self ._thumbs =IconCache (cache_dir or os .path .join (os .path .expanduser ('~'),'.iSync','icons'))
+        self ._ui =dispatcher or UIDispatcher (self )
         self ._tmpdir =tempfile .mkdtemp (prefix ="apps_icons_")
         self ._images ={}# keep references to photoimage
         self ._app_paths ={}
         self ._icon_cache ={}# app_path -> local icon path
         self ._loading =False 
         self ._load_id =0 
+        # (load id, iid, decoded image or local path) waiting for the ui thread
+        self ._ready =collections .deque ()
         # try to enable high-quality resize with pil
         try :
             from PIL import Image ,ImageTk # type: ignore
@@ -78,6 +297,10 @@ class ApplicationsFrame (ttk .Frame ):
         yscroll .place (in_ =self .tree ,relx =1.0 ,rely =0 ,relheight =1.0 ,anchor ="ne")
 
     def _set_status (self ,msg ):
+    # any thread
+        self ._ui .coalesce (('apps-status',id (self )),self ._show_status ,msg )
+
+    def _show_status (self ,msg ):
         try :
             self .status .configure (text =msg )
         except Exception :
@@ -99,66 +322,54 @@ class ApplicationsFrame (ttk .Frame ):
 
         def worker ():
             client =None 
-            sftp =None 
+            sftp_box =[]
+
+            def get_sftp ():
+            # opened on first use: a fully cached refresh never needs it
+                if not sftp_box :
+                    sftp_box .append (client .open_sftp ())
+                return sftp_box [0 ]
             try :
                 try :
                     client =self .get_connection ()
                 except Exception as e :
                     emsg =f"Connect failed: {e}"
-                    self .after (0 ,lambda m =emsg :self ._set_status (m ))
-                    return 
-                try :
-                    sftp =client .open_sftp ()
-                except Exception as e :
-                    emsg =f"SFTP failed: {e}"
-                    self .after (0 ,lambda m =emsg :self ._set_status (m ))
+                    self ._set_status (emsg )
                     return 
-                dest ="/Applications"
-                try :
-                    sftp .stat ("/var/jb/Applications")
-                    dest ="/var/jb/Applications"
-                except Exception :
-                    pass 
-                self .after (0 ,lambda :self ._set_status (f"Listing {dest}…"))
-                try :
-                    entries =sftp .listdir_attr (dest )
-                except Exception as e :
-                    emsg =f"List failed: {e}"
-                    self .after (0 ,lambda m =emsg :self ._set_status (m ))
-                    return 
-                apps =[]
-                for ent in entries :
-                    if not ent .filename .endswith ('.app'):
-                        continue 
+                self ._set_status ("Reading app inventory…")
+                dest ,records =self ._read_inventory (client )
+                if records is None :
+                # no usable shell: list over sftp, then one listing per bundle
                     try :
-                        if stat .S_ISDIR (ent .st_mode ):
-                            apps .append (ent )
-                    except Exception :
-                    # as a fallback assume its a directory
-                        apps .append (ent )
-                apps .sort (key =lambda a :a .filename .lower ())
+                        sftp =get_sftp ()
+                    except Exception as e :
+                        emsg =f"SFTP failed: {e}"
+                        self ._set_status (emsg )
+                        return 
+                    dest ,records =self ._list_apps_sftp (sftp )
+                    if records is None :
+                        return 
+                device =self ._device_id (client )
+                apps =sorted (records ,key =lambda a :a ['name'].lower ())
 
-                total =len (apps )
-                def insert_row (name ,app_path ,img_path ):
+                def insert_rows ():
+                # every row at once with the placeholder; icons replace it in place as they arrive
                     if load_id !=self ._load_id :
                         return 
-                        # create photoimage on the ui thread only
-                    img =self ._make_icon_from_local (img_path )if img_path else self ._default_icon ()
-                    iid =self .tree .insert ("",tk .END ,text =name ,image =img )
-                    self ._images [iid ]=img 
-                    self ._app_paths [iid ]=app_path 
-                for idx ,ent in enumerate (apps ,start =1 ):
-                    if load_id !=self ._load_id :
-                        break 
-                    app_path =f"{dest}/{ent.filename}"
-                    img_path =self ._find_icon_path (sftp ,app_path )
-                    self .after (0 ,insert_row ,ent .filename ,app_path ,img_path )
-                    if idx %5 ==0 or idx ==total :
-                        self .after (0 ,lambda i =idx ,t =total :self ._set_status (f"Loaded {i}/{t} apps…"))
-                self .after (0 ,lambda :self ._set_status (f"Loaded {total} apps."))
+                    placeholder =self ._default_icon ()
+                    for rec in apps :
+                        app_path =f"{dest}/{rec['name']}"
+                        iid =self .tree .insert ("",tk .END ,iid =app_path ,text =rec ['name'],image =placeholder )
+                        self ._images [iid ]=placeholder 
+                        self ._app_paths [iid ]=app_path 
+                self ._ui .call (insert_rows )
+                self ._resolve_icons (client ,get_sftp ,dest ,apps ,device )
+                self ._load_icons (client ,dest ,apps ,load_id )
+                if load_id ==self ._load_id :
+                    self ._set_status (f"Loaded {len(apps)} apps.")
             finally :
                 try :
-                    sftp and sftp .close ()
+                    sftp_box and sftp_box [0 ].close ()
                 except Exception :
                     pass 
                 try :
@@ -173,37 +384,276 @@ class ApplicationsFrame (ttk .Frame ):
                             self .refresh_btn .configure (state =tk .NORMAL )
                         except Exception :
                             pass 
-                self .after (0 ,finish )
+                self ._ui .call (finish )
 
         threading .Thread (target =worker ,daemon =True ).start ()
 
-    def _find_icon_path (self ,sftp ,app_path ):
-        """Return a local file path for the best icon for this app, or a local fallback path if available. None if need to use generated placeholder."""
-        # cache
-        if app_path in self ._icon_cache and os .path .exists (self ._icon_cache [app_path ]):
-            return self ._icon_cache [app_path ]
-            # 1 try explicit candidate filenames
-        for name in self .ICON_CANDIDATES :
-            remote_file =f"{app_path}/{name}"
+    def _read_inventory (self ,client ):
+        """(applications dir, records) from one exec, or (None, None) when the device can't run it."""
+        out =[]
+        try :
+            rc =run_command (client ,_INVENTORY_SH ,on_output =out .append )
+        except Exception :
+            return None ,None 
+        root ,apps =parse_inventory ("\n".join (out ))
+        if not root or (rc !=0 and not apps ):
+            return None ,None 
+        return root ,apps 
+
+    def _list_apps_sftp (self ,sftp ):
+        dest ="/Applications"
+        try :
+            sftp .stat ("/var/jb/Applications")
+            dest ="/var/jb/Applications"
+        except Exception :
+            pass 
+        self ._set_status (f"Listing {dest}…")
+        try :
+            entries =sftp .listdir_attr (dest )
+        except Exception as e :
+            self ._set_status (f"List failed: {e}")
+            return dest ,None 
+        apps =[]
+        for ent in entries :
+            if not ent .filename .endswith ('.app'):
+                continue 
+            try :
+                if not stat .S_ISDIR (ent .st_mode ):
+                    continue 
+            except Exception :
+                pass # as a fallback assume its a directory
+                # pngs None: not listed yet
+            apps .append ({'name':ent .filename ,'plist_mtime':0 ,'plist_size':0 ,'declared':[],'pngs':None })
+        return dest ,apps 
+
+    def _pick_icon (self ,rec ):
+        """Largest of the bundle's pngs matching a declared icon name (any @Nx/~ipad variant), or None."""
+        pngs =rec ['pngs']or []
+        declared ={_icon_base (n )for n in rec ['declared']}
+        matches =[p for p in pngs if _icon_base (p )in declared ]
+        if not matches :
+        # nothing declared that exists: the old fixed names, then anything called *icon*
+            lower ={p .lower ():p for p in pngs }
+            for name in self .ICON_CANDIDATES :
+                if name in lower :
+                    return lower [name ]
+            matches =[p for p in pngs if 'icon'in p .lower ()]
+        return max (matches ,key =_icon_pixels )if matches else None 
+
+    def _read_plists (self ,client ,get_sftp ,dest ,names ):
+        """
+        {name: parsed dest/<name>/Info.plist}: one exec per batch of bundle names, the loop runs on the
+        device and prints each file's length then its bytes.
+        """
+        batches =[[]]
+        size =0 
+        for name in names :
+            if batches [-1 ]and size +len (_sh_quote (name ))>_PLIST_BATCH_BYTES :
+                batches .append ([])
+                size =0 
+            batches [-1 ].append (name )
+            size +=len (_sh_quote (name ))+1 
+        raw ={}
+        for batch in batches :
+            if not batch :
+                continue 
             try :
-                sftp .stat (remote_file )
-                path =self ._download_icon_to_local (sftp ,remote_file )
-                if path :
-                    self ._icon_cache [app_path ]=path 
-                    return path 
+                sh =(f"R={_sh_quote(dest)}; for n in {' '.join(_sh_quote(n) for n in batch)}; do p=\"$R/$n/Info.plist\"; "
+                "if [ -r \"$p\" ]; then wc -c < \"$p\"; cat \"$p\"; else echo -1; fi; done")
+                _ ,stdout ,_ =client .exec_command (sh )
+                data =stdout .read ()
+                pos =0 
+                for name in batch :
+                    nl =data .index (b'\n',pos )
+                    n =int (data [pos :nl ].strip ())
+                    pos =nl +1 
+                    if n >=0 :
+                        raw [name ]=data [pos :pos +n ]
+                        pos +=n 
+            except Exception :
+            # no shell or a short read: this batch per file over sftp
+                for name in batch :
+                    if name in raw :
+                        continue 
+                    try :
+                        with get_sftp ().open (f"{dest}/{name}/Info.plist",'rb')as f :
+                            raw [name ]=f .read ()
+                    except Exception :
+                        pass 
+        out ={}
+        for name ,blob in raw .items ():
+            try :
+                info =plistlib .loads (blob )
+                if isinstance (info ,dict ):
+                    out [name ]=info 
             except Exception :
                 pass 
-                # 2 skip deep scan for speed fall back to local branding
-                # 3 fallback to defappavif or defapppng in cwd or a generated placeholder
-        fallback_avif =os .path .join (os .getcwd (),"defapp.avif")
-        if os .path .exists (fallback_avif ):
-            self ._icon_cache [app_path ]=fallback_avif 
-            return fallback_avif 
-        fallback =os .path .join (os .getcwd (),"defapp.png")
-        if os .path .exists (fallback ):
-            self ._icon_cache [app_path ]=fallback 
-            return fallback 
-            # final fallback: generated 128x128 placeholder
+        return out 
+
+    def _resolve_icons (self ,client ,get_sftp ,dest ,apps ,device ):
+        """
+        Set rec['key'] and rec['icon'] for every app. Cached thumbnails and names are used as they are;
+        only the remaining apps have their Info.plist read, all in one go.
+        """
+        need =[]
+        for rec in apps :
+            app_path =f"{dest}/{rec['name']}"
+            if rec ['pngs']is None :
+            # sftp mode: one listing gives the pngs and the plist mtime/size for the key
+                try :
+                    attrs ={a .filename :a for a in get_sftp ().listdir_attr (app_path )}
+                    rec ['pngs']=[n for n in attrs if n .lower ().endswith ('.png')]
+                    plist =attrs .get ('Info.plist')
+                    if plist is not None :
+                        rec ['plist_mtime'],rec ['plist_size']=int (plist .st_mtime or 0 ),int (plist .st_size or 0 )
+                except Exception :
+                    rec ['pngs']=[]
+            rec ['key']=IconCache .key (device ,app_path ,rec ['plist_mtime'],rec ['plist_size'])if rec ['plist_mtime']else None 
+            name =self ._thumbs .name (rec ['key'])if rec ['key']else None 
+            if name is not None :
+                rec ['icon']=name or None 
+            elif rec ['key']and self ._thumbs .get (rec ['key']):
+                rec ['icon']=None 
+            else :
+                need .append (rec )
+        if not need :
+            return 
+        self ._set_status (f"Reading {len(need)} Info.plist file(s)…")
+        plists =self ._read_plists (client ,get_sftp ,dest ,[rec ['name']for rec in need ])
+        resolved ={}
+        for rec in need :
+            info =plists .get (rec ['name'])
+            if info :
+                rec ['declared']=icon_names (info )+rec ['declared']
+            rec ['icon']=self ._pick_icon (rec )
+            if rec ['key']:
+                resolved [rec ['key']]=rec ['icon']
+        if resolved :
+            self ._thumbs .set_names (resolved )
+
+    def _load_icons (self ,client ,dest ,apps ,load_id ):
+        """
+        Fetch icons on FETCH_WORKERS threads, each with its own sftp session opened only on a cache miss,
+        decode and resize them on a DECODE_WORKERS pool, and hand the pixels to the ui thread.
+        Returns once every icon is through.
+        """
+        jobs =queue .Queue ()
+        for rec in apps :
+            jobs .put (rec )
+        total =len (apps )
+        done =[0 ]
+        lock =threading .Lock ()
+        decoder =ThreadPoolExecutor (max_workers =self .DECODE_WORKERS )
+
+        def fetcher ():
+            sftp_box =[]
+
+            def get_sftp ():
+                if not sftp_box :
+                    sftp_box .append (client .open_sftp ())
+                return sftp_box [0 ]
+            try :
+                while load_id ==self ._load_id :
+                    try :
+                        rec =jobs .get_nowait ()
+                    except queue .Empty :
+                        return 
+                    app_path =f"{dest}/{rec['name']}"
+                    try :
+                        img_path =self ._fetch_icon (get_sftp ,app_path ,rec .get ('icon'),rec .get ('key'))
+                    except Exception :
+                        img_path =self ._local_fallback_icon (app_path )
+                    if img_path :
+                        decoder .submit (self ._decode_icon ,load_id ,app_path ,img_path )
+                    with lock :
+                        done [0 ]+=1 
+                        n =done [0 ]
+                    if n %5 ==0 or n ==total :
+                        self ._set_status (f"Loaded {n}/{total} icons…")
+            finally :
+                try :
+                    sftp_box and sftp_box [0 ].close ()
+                except Exception :
+                    pass 
+        threads =[threading .Thread (target =fetcher ,daemon =True )for _ in range (min (self .FETCH_WORKERS ,total ))]
+        for t in threads :
+            t .start ()
+        for t in threads :
+            t .join ()
+        decoder .shutdown (wait =True )
+
+    def _decode_icon (self ,load_id ,iid ,local_file ,max_size =128 ):
+    # decode pool: pil does the open and the lanczos resize here; tk has to read files itself on its thread
+        payload =local_file 
+        if self ._PIL and not local_file .lower ().endswith ('.avif'):
+            Image ,_ =self ._PIL 
+            try :
+                im =Image .open (local_file ).convert ('RGBA')
+                im .thumbnail ((max_size ,max_size ),Image .LANCZOS )
+                im .load ()
+                payload =im 
+            except Exception :
+                pass 
+        self ._ready .append ((load_id ,iid ,payload ))
+        self ._ui .coalesce (('apps-icons',id (self )),self ._apply_icons )
+
+    def _apply_icons (self ):
+        """Ui thread: wrap the decoded pixels into PhotoImages and swap them into their rows."""
+        while True :
+            try :
+                load_id ,iid ,payload =self ._ready .popleft ()
+            except IndexError :
+                break 
+            if load_id !=self ._load_id or not self .tree .exists (iid ):
+                continue 
+            try :
+                if isinstance (payload ,str ):
+                    img =self ._make_icon_from_local (payload )
+                else :
+                    img =self ._PIL [1 ].PhotoImage (payload )
+            except Exception :
+                img =None 
+            if img is not None :
+                self .tree .item (iid ,image =img )
+                self ._images [iid ]=img 
+
+    def _device_id (self ,client ):
+        """Host key fingerprint, so a reused ip on another device doesn't hit this one's icons."""
+        try :
+            key =client .get_transport ().get_remote_server_key ()
+            return f"{key.get_name()}:{key.get_fingerprint().hex()}"
+        except Exception :
+            pass 
+        try :
+            return str (client .get_transport ().getpeername ()[0 ])
+        except Exception :
+            return 'device'
+
+    def _fetch_icon (self ,get_sftp ,app_path ,name ,key =None ):
+        """
+        The chosen icon from the disk cache when key (device, path, plist mtime/size) is known,
+        else downloaded and thumbnailed into it; the local fallbacks when there is none.
+        """
+        if key :
+            cached =self ._thumbs .get (key )
+            if cached :
+                return cached 
+        if app_path in self ._icon_cache and os .path .exists (self ._icon_cache [app_path ]):
+            return self ._icon_cache [app_path ]
+        if name :
+            path =self ._download_icon_to_local (get_sftp (),f"{app_path}/{name}")
+            if path :
+                if key :
+                    path =self ._thumbs .put (key ,path )or path 
+                self ._icon_cache [app_path ]=path 
+                return path 
+        return self ._local_fallback_icon (app_path )
+
+    def _local_fallback_icon (self ,app_path ):
+        for fallback in (os .path .join (os .getcwd (),"defapp.avif"),os .path .join (os .getcwd (),"defapp.png")):
+            if os .path .exists (fallback ):
+                self ._icon_cache [app_path ]=fallback 
+                return fallback 
         return None 
 
     def _download_icon_to_local (self ,sftp ,remote_file ):
@@ -213,9 +663,14 @@ class ApplicationsFrame (ttk .Frame ):
         )
         try :
             sftp .get (remote_file ,local_file )
-            return local_file 
         except Exception :
             return None 
+        try :
+        # bundle pngs are usually xcode-crushed (CgBI): neither pil nor tk can read those
+            cgbi .normalize_file (local_file )
+        except Exception :
+            pass 
+        return local_file 
 
     def _default_icon (self ,size :int =128 ):
         """Generate a neutral placeholder icon of given size."""
@@ -298,7 +753,7 @@ class ApplicationsFrame (ttk .Frame ):
                 try :
                     client =self .get_connection ()
                 except Exception as e :
-                    self .after (0 ,lambda :self ._set_status (f"Connect failed: {e}"))
+                    self ._set_status (f"Connect failed: {e}")
                     return 
                 sh =(
                 "PLUTIL=$(command -v /var/jb/usr/bin/plutil || command -v /usr/bin/plutil); "
@@ -327,7 +782,7 @@ class ApplicationsFrame (ttk .Frame ):
                 out =stdout .read ().decode (errors ='ignore').strip ()
                 err =stderr .read ().decode (errors ='ignore').strip ()
                 msg =out or err or f"Tried launching {app_name}"
-                self .after (0 ,lambda :self ._set_status (msg ))
+                self ._set_status (msg )
             finally :
                 try :
                     client and client .close ()
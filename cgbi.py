@@ -0,0 +1,171 @@
+import struct 
+import zlib 
+
+try :
+    import numpy as np 
+except Exception :
+    np =None 
+
+PNG_SIGNATURE =b'\x89PNG\r\n\x1a\n'
+
+
+def is_cgbi (data ):
+    """True for an Xcode-crushed png: a CgBI chunk before IHDR."""
+    return data [:8 ]==PNG_SIGNATURE and data [12 :16 ]==b'CgBI'
+
+
+def _chunks (data ):
+    pos =8 
+    while pos +8 <=len (data ):
+        length ,ctype =struct .unpack ('>I4s',data [pos :pos +8 ])
+        yield ctype ,data [pos +8 :pos +8 +length ]
+        pos +=12 +length 
+        if ctype ==b'IEND':
+            return 
+
+
+def _paeth (a ,b ,c ):
+    p =a +b -c 
+    pa ,pb ,pc =abs (p -a ),abs (p -b ),abs (p -c )
+    if pa <=pb and pa <=pc :
+        return a 
+    return b if pb <=pc else c 
+
+
+def _unfilter (raw ,width ,height ,bpp ):
+    """Undo the per-row png filters; returns the bare pixel bytes."""
+    stride =width *bpp 
+    if len (raw )<(stride +1 )*height :
+        raise ValueError ("truncated image data")
+    if np is not None :
+        return _unfilter_np (raw ,width ,height ,bpp )
+    out =bytearray (stride *height )
+    prev =bytearray (stride )
+    for y in range (height ):
+        row =_unfilter_row (raw [y *(stride +1 )],bytearray (raw [y *(stride +1 )+1 :(y +1 )*(stride +1 )]),prev ,bpp )
+        out [y *stride :(y +1 )*stride ]=row 
+        prev =row 
+    return bytes (out )
+
+
+def _unfilter_row (ftype ,row ,prev ,bpp ):
+    """Undo one row's filter in place (row and prev are bytearrays) and return it."""
+    stride =len (row )
+    if ftype ==1 :
+        for i in range (bpp ,stride ):
+            row [i ]=(row [i ]+row [i -bpp ])&0xff 
+    elif ftype ==2 :
+        for i in range (stride ):
+            row [i ]=(row [i ]+prev [i ])&0xff 
+    elif ftype ==3 :
+        for i in range (stride ):
+            left =row [i -bpp ]if i >=bpp else 0 
+            row [i ]=(row [i ]+((left +prev [i ])>>1 ))&0xff 
+    elif ftype ==4 :
+        for i in range (stride ):
+            left =row [i -bpp ]if i >=bpp else 0 
+            upleft =prev [i -bpp ]if i >=bpp else 0 
+            row [i ]=(row [i ]+_paeth (left ,prev [i ],upleft ))&0xff 
+    elif ftype !=0 :
+        raise ValueError (f"bad filter type {ftype}")
+    return row 
+
+
+def _unfilter_np (raw ,width ,height ,bpp ):
+    rows =np .frombuffer (raw ,dtype =np .uint8 ,count =(width *bpp +1 )*height ).reshape (height ,width *bpp +1 )
+    out =np .zeros ((height ,width ,bpp ),dtype =np .uint8 )
+    prev =np .zeros ((width ,bpp ),dtype =np .uint8 )
+    for y in range (height ):
+        ftype =rows [y ,0 ]
+        cur =rows [y ,1 :].reshape (width ,bpp )
+        if ftype ==0 :
+            row =cur 
+        elif ftype ==1 :
+        # a running sum per channel, wrapping at 256
+            row =np .cumsum (cur ,axis =0 ,dtype =np .uint8 )
+        elif ftype ==2 :
+            row =cur +prev 
+        elif ftype in (3 ,4 ):
+        # each byte depends on the one just decoded: per-element numpy is slower than the plain loop
+            row =_unfilter_row (ftype ,bytearray (cur .tobytes ()),bytearray (prev .tobytes ()),bpp )
+            row =np .frombuffer (row ,dtype =np .uint8 ).reshape (width ,bpp )
+        else :
+            raise ValueError (f"bad filter type {ftype}")
+        out [y ]=row 
+        prev =row 
+    return out .tobytes ()
+
+
+def _to_rgba (pixels ,width ,height ,bpp ):
+    """BGR(A), premultiplied -> straight RGBA."""
+    if np is not None :
+        px =np .frombuffer (pixels ,dtype =np .uint8 ).reshape (height *width ,bpp )
+        rgba =np .empty ((height *width ,4 ),dtype =np .uint8 )
+        rgba [:,0 ],rgba [:,1 ],rgba [:,2 ]=px [:,2 ],px [:,1 ],px [:,0 ]
+        if bpp ==4 :
+            alpha =px [:,3 ].astype (np .uint16 )
+            rgba [:,3 ]=px [:,3 ]
+            part =(alpha >0 )&(alpha <255 )
+            rgb =rgba [part ,:3 ].astype (np .uint16 )
+            a =alpha [part ][:,None ]
+            rgba [part ,:3 ]=np .minimum (255 ,(rgb *255 +a //2 )//a ).astype (np .uint8 )
+        else :
+            rgba [:,3 ]=255 
+        return rgba .tobytes ()
+    n =width *height 
+    rgba =bytearray (n *4 )
+    rgba [0 ::4 ]=pixels [2 ::bpp ]
+    rgba [1 ::4 ]=pixels [1 ::bpp ]
+    rgba [2 ::4 ]=pixels [0 ::bpp ]
+    if bpp ==3 :
+        rgba [3 ::4 ]=b'\xff'*n 
+        return bytes (rgba )
+    rgba [3 ::4 ]=pixels [3 ::4 ]
+    for i in range (3 ,n *4 ,4 ):
+        a =rgba [i ]
+        if 0 <a <255 :
+            for j in (i -3 ,i -2 ,i -1 ):
+                rgba [j ]=min (255 ,(rgba [j ]*255 +a //2 )//a )
+    return bytes (rgba )
+
+
+def decode (data ):
+    """(width, height, RGBA bytes) from a CgBI png."""
+    ihdr =None 
+    idat =[]
+    for ctype ,body in _chunks (data ):
+        if ctype ==b'IHDR':
+            ihdr =body 
+        elif ctype ==b'IDAT':
+            idat .append (body )
+    if ihdr is None or not idat :
+        raise ValueError ("not a png")
+    width ,height ,depth ,color ,_ ,_ ,interlace =struct .unpack ('>IIBBBBB',ihdr [:13 ])
+    if depth !=8 or color not in (2 ,6 )or interlace :
+        raise ValueError (f"unsupported CgBI png (depth {depth}, color {color}, interlace {interlace})")
+    bpp =4 if color ==6 else 3 
+    # headerless deflate, no zlib wrapper
+    raw =zlib .decompressobj (-15 ).decompress (b''.join (idat ))
+    return width ,height ,_to_rgba (_unfilter (raw ,width ,height ,bpp ),width ,height ,bpp )
+
+
+def encode_png (width ,height ,rgba ):
+    """A plain RGBA png, no filtering."""
+    def chunk (ctype ,body ):
+        return struct .pack ('>I',len (body ))+ctype +body +struct .pack ('>I',zlib .crc32 (ctype +body )&0xffffffff )
+    stride =width *4 
+    raw =b''.join (b'\x00'+rgba [y *stride :(y +1 )*stride ]for y in range (height ))
+    return (PNG_SIGNATURE +chunk (b'IHDR',struct .pack ('>IIBBBBB',width ,height ,8 ,6 ,0 ,0 ,0 ))+
+    chunk (b'IDAT',zlib .compress (raw ,6 ))+chunk (b'IEND',b''))
+
+
+def normalize_file (path ):
+    """Rewrite a CgBI png in place as a standard one. True if it was converted."""
+    with open (path ,'rb')as f :
+        data =f .read ()
+    if not is_cgbi (data ):
+        return False 
+    width ,height ,rgba =decode (data )
+    with open (path ,'wb')as f :
+        f .write (encode_png (width ,height ,rgba ))
+    return True 
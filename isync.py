@@ -11,6 +11,7 @@ import shutil
 import urllib .request 
 import json 
 import plistlib 
+import hashlib 
 
 # third-party
 try :
@@ -30,6 +31,11 @@ except Exception :
     _DND_AVAILABLE =False 
 
     # local
+from ssh_pool import SSHPool ,run_command 
+from sftp_transfer import (HashCache ,ProgressMeter ,format_rate ,dir_entries ,list_remote_tree ,load_manifest ,remote_sha256 ,remove_remote_paths ,
+resumable_put ,save_manifest ,sftp_makedirs ,sync_plan ,tar_upload ,upload_entries ,zip_entries )
+from app_packer import pack_app_dir ,repack_app_from_ipa 
+from ui_dispatch import LogSink ,UIDispatcher 
 ExplorerFrame =None 
 try :
 # prefer new module name
@@ -84,6 +90,17 @@ class IPAGui ((TkinterDnD .Tk if _DND_AVAILABLE else tk .Tk )):
 
         # preferences
         self .no_respring =tk .BooleanVar (value =False )
+        # jailfr3e transfer: stream members from the ipa, extract to a temp dir first, or one tar stream
+        self .jf_transfer_mode =tk .StringVar (value ="stream")
+        # appdrop transfer: zip + remote unzip, or tar piped into tar -x
+        self .ad_transfer_mode =tk .StringVar (value ="zip")
+        self .tar_compress =tk .BooleanVar (value =False )
+        # deflate level for appdrop zips, lower is faster on a quick lan
+        self .zip_level =tk .IntVar (value =6 )
+        # parallel sftp sessions used for .app uploads
+        self .upload_concurrency =tk .IntVar (value =4 )
+        # lines kept in each output pane, older ones are dropped
+        self .log_max_lines =tk .IntVar (value =5000 )
 
         # installer choice: ipainstaller or appinst appinst not implemented yet
         self .installer_choice =tk .StringVar (value ="ipainstaller")
@@ -134,6 +151,12 @@ class IPAGui ((TkinterDnD .Tk if _DND_AVAILABLE else tk .Tk )):
         self ._led_anim_job =None 
         self ._led_on =False 
 
+        # authenticated transports shared by every tab, see _connect
+        self ._ssh_pool =SSHPool ()
+        # worker threads reach tk only through this, see ui_dispatch.UIDispatcher
+        self ._ui =UIDispatcher (self )
+        self ._hash_cache =HashCache (os .path .join (os .path .expanduser ('~'),'.iSync','hash_cache.json'))
+
         self ._build_ui ()
         # try to load settings after ui created to populate combos
         try :
@@ -406,7 +429,7 @@ class IPAGui ((TkinterDnD .Tk if _DND_AVAILABLE else tk .Tk )):
                 try :
                     if not self .commands_only .get ():
                         self ._log ("SSH test: Connected successfully.")
-                    messagebox .showinfo ("SSH","Connected successfully.")
+                    self ._ui .call (messagebox .showinfo ,"SSH","Connected successfully.")
                 finally :
                     try :
                         client .close ()
@@ -415,7 +438,7 @@ class IPAGui ((TkinterDnD .Tk if _DND_AVAILABLE else tk .Tk )):
             except Exception as e :
                 if not self .commands_only .get ():
                     self ._log (f"SSH test failed: {e}")
-                messagebox .showerror ("SSH Test Failed",str (e ))
+                self ._ui .call (messagebox .showerror ,"SSH Test Failed",str (e ))
         try :
             self ._run_with_icon_anim (run )
         except Exception :
@@ -524,6 +547,10 @@ class IPAGui ((TkinterDnD .Tk if _DND_AVAILABLE else tk .Tk )):
         attach (self .private_key_path )
 
     def _set_status (self ,text :str ):
+    # any thread; rapid progress updates collapse into one per pump tick
+        self ._ui .coalesce ('status',self ._show_status ,text )
+
+    def _show_status (self ,text ):
         try :
             self .status_text .set (text )
             self .status_device .set (f"{self.iphone_ip.get()}:{self.iphone_port.get()}")
@@ -686,13 +713,13 @@ class IPAGui ((TkinterDnD .Tk if _DND_AVAILABLE else tk .Tk )):
         def runner ():
             try :
             # start on ui thread
-                self .after (0 ,self ._start_icon_animation )
-                self .after (0 ,lambda :self ._enter_busy ("Working…"))
+                self ._ui .call (self ._start_icon_animation )
+                self ._ui .call (self ._enter_busy ,"Working…")
                 target ()
             finally :
             # stop on ui thread
-                self .after (0 ,self ._leave_busy )
-                self .after (0 ,self ._stop_icon_animation )
+                self ._ui .call (self ._leave_busy )
+                self ._ui .call (self ._stop_icon_animation )
         threading .Thread (target =runner ,daemon =True ).start ()
 
     def _add_history (self ,hist_list ,value ,maxlen =15 ):
@@ -705,7 +732,7 @@ class IPAGui ((TkinterDnD .Tk if _DND_AVAILABLE else tk .Tk )):
         hist_list .insert (0 ,v )
         # trim
         del hist_list [maxlen :]
-        self ._refresh_combos ()
+        self ._ui .call (self ._refresh_combos )
 
     def _refresh_combos (self ):
     # safely update all combobox values if they exist
@@ -920,6 +947,7 @@ class IPAGui ((TkinterDnD .Tk if _DND_AVAILABLE else tk .Tk )):
         except Exception :
             pass 
         self .output .pack (fill =tk .BOTH ,expand =True )
+        self ._out_sink =LogSink (self .output ,max_lines =self .log_max_lines .get ())
 
         # ixplorer tab
         if ExplorerFrame is not None :
@@ -928,6 +956,7 @@ class IPAGui ((TkinterDnD .Tk if _DND_AVAILABLE else tk .Tk )):
                 notebook ,
                 get_connection =self ._connect ,
                 ip_var =self .iphone_ip ,
+                dispatcher =self ._ui ,
                 )
                 notebook .add (explorer_tab ,text ="iXplorer")
             except Exception as e :
@@ -947,6 +976,7 @@ class IPAGui ((TkinterDnD .Tk if _DND_AVAILABLE else tk .Tk )):
             apps_tab =ApplicationsFrame (
             notebook ,
             get_connection =self ._connect ,
+            dispatcher =self ._ui ,
             )
             notebook .add (apps_tab ,text ="Applications")
         except Exception as e :
@@ -1020,6 +1050,18 @@ class IPAGui ((TkinterDnD .Tk if _DND_AVAILABLE else tk .Tk )):
         ttk .Button (jf_actions ,text ="Batch Install IPAs…",command =self ._on_batch_jf_ipas ).pack (side =tk .LEFT ,padx =8 )
         ttk .Button (jf_actions ,text ="Batch AppDrop Folders…",command =self ._on_batch_appdrop ).pack (side =tk .LEFT ,padx =8 )
         ttk .Checkbutton (jf_actions ,text ="Don't respring after install",variable =self .no_respring ).pack (side =tk .LEFT ,padx =8 )
+        jf_xfer =ttk .LabelFrame (jf_main ,text ="Transfer")
+        jf_xfer .pack (fill =tk .X ,padx =5 ,pady =5 )
+        ttk .Label (jf_xfer ,text ="JAILFR3E upload:").pack (side =tk .LEFT ,padx =5 )
+        self .jf_mode_combo =ttk .Combobox (jf_xfer ,width =10 ,state ="readonly",textvariable =self .jf_transfer_mode ,values =["stream","extract","tar"])
+        self .jf_mode_combo .pack (side =tk .LEFT ,padx =5 ,pady =5 )
+        ttk .Label (jf_xfer ,text ="Parallel uploads:").pack (side =tk .LEFT ,padx =5 )
+        ttk .Spinbox (jf_xfer ,from_ =1 ,to =16 ,width =4 ,textvariable =self .upload_concurrency ).pack (side =tk .LEFT ,padx =5 ,pady =5 )
+        ttk .Label (jf_xfer ,text ="AppDrop upload:").pack (side =tk .LEFT ,padx =5 )
+        ttk .Combobox (jf_xfer ,width =6 ,state ="readonly",textvariable =self .ad_transfer_mode ,values =["zip","tar","sync"]).pack (side =tk .LEFT ,padx =5 ,pady =5 )
+        ttk .Checkbutton (jf_xfer ,text ="gzip tar stream",variable =self .tar_compress ).pack (side =tk .LEFT ,padx =5 )
+        ttk .Label (jf_xfer ,text ="Zip level:").pack (side =tk .LEFT ,padx =5 )
+        ttk .Spinbox (jf_xfer ,from_ =0 ,to =9 ,width =3 ,textvariable =self .zip_level ).pack (side =tk .LEFT ,padx =5 ,pady =5 )
         jf_extras =ttk .LabelFrame (jf_main ,text ="Extras")
         jf_extras .pack (fill =tk .X ,padx =5 ,pady =5 )
         ttk .Button (jf_extras ,text ="Clean leftovers (zip/app)",command =self ._on_clean_leftovers ).pack (side =tk .LEFT ,padx =5 ,pady =5 )
@@ -1028,6 +1070,7 @@ class IPAGui ((TkinterDnD .Tk if _DND_AVAILABLE else tk .Tk )):
         ttk .Button (jf_extras ,text ="Install .deb from URL…",command =self ._on_install_deb_url ).pack (side =tk .LEFT ,padx =5 ,pady =5 )
         ttk .Button (jf_extras ,text ="Uninstall package…",command =self ._on_uninstall_deb ).pack (side =tk .LEFT ,padx =5 ,pady =5 )
         ttk .Button (jf_extras ,text ="Save Output…",command =self ._on_save_jf_output ).pack (side =tk .LEFT ,padx =5 ,pady =5 )
+        ttk .Button (jf_extras ,text ="Benchmark transfers",command =self ._on_benchmark_transfer ).pack (side =tk .LEFT ,padx =5 ,pady =5 )
         jf_out =ttk .LabelFrame (jf_main ,text ="Output")
         jf_out .pack (fill =tk .BOTH ,expand =True ,padx =5 ,pady =5 )
         self .jf_output =ScrolledText (jf_out ,height =12 ,wrap =tk .WORD ,state =tk .DISABLED )
@@ -1042,6 +1085,7 @@ class IPAGui ((TkinterDnD .Tk if _DND_AVAILABLE else tk .Tk )):
         except Exception :
             pass 
         self .jf_output .pack (fill =tk .BOTH ,expand =True )
+        self ._jf_sink =LogSink (self .jf_output ,max_lines =self .log_max_lines .get ())
 
         # about tab licenses and credits
         about_tab =ttk .Frame (notebook )
@@ -1250,77 +1294,46 @@ class IPAGui ((TkinterDnD .Tk if _DND_AVAILABLE else tk .Tk )):
         var .set ("/var/mobile/Documents/")
 
     def _log (self ,text ):
-        # make the output read-only except when appending
-        self .output .configure (state =tk .NORMAL )
-        try :
-            self ._append_colored (self .output ,text )
-        except Exception :
-            self .output .insert (tk .END ,text +"\n")
-        self .output .see (tk .END )
-        self .output .configure (state =tk .DISABLED )
+    # any thread: the sink batches lines into the read-only widget on the tk thread
+        self ._out_sink .write (text )
 
     def _clear_output (self ):
-        try :
-            self .output .configure (state =tk .NORMAL )
-            self .output .delete ("1.0",tk .END )
-        finally :
-            self .output .configure (state =tk .DISABLED )
+        self ._out_sink .clear ()
 
     def _jf_log (self ,text :str ):
-        def do ():
-            try :
-                self .jf_output .configure (state =tk .NORMAL )
-                try :
-                    self ._append_colored (self .jf_output ,text )
-                except Exception :
-                    self .jf_output .insert (tk .END ,text +"\n")
-                self .jf_output .see (tk .END )
-            finally :
-                self .jf_output .configure (state =tk .DISABLED )
-        self .after (0 ,do )
-
-    def _append_colored (self ,widget ,text :str ):
-        # simple heuristics to colorize ls-like output and common paths
-        # splits on lines, applies tags when detected
-        lines =str (text ).splitlines ()or [""]
-        for line in lines :
-            applied =False 
-            stripped =line .strip ()
-            # ls -l style: permission char first
-            if stripped [:1 ]in ['d','-','l'] and len (stripped )>10 and ' ' in stripped :
-                parts =stripped .split ()
-                name =parts [-1 ]if parts else stripped 
-                if stripped .startswith ('d') or name .endswith ('/'):
-                    widget .insert (tk .END ,line +"\n",('dir',))
-                    applied =True 
-                elif 'x' in parts [0 ]:
-                    widget .insert (tk .END ,line +"\n",('exec',))
-                    applied =True 
-            # directories in plain ls often end with /
-            if not applied and stripped .endswith ('/'):
-                widget .insert (tk .END ,line +"\n",('dir',))
-                applied =True 
-            # highlight Applications or *.app bundles
-            if not applied and ('/Applications' in stripped or ' Applications' in stripped or stripped .endswith ('.app') or '.app/' in stripped ):
-                widget .insert (tk .END ,line +"\n",('app',))
-                applied =True 
-            # color common path-looking strings
-            if not applied and ('/' in stripped or '\\' in stripped ):
-                widget .insert (tk .END ,line +"\n",('path',))
-                applied =True 
-            # warnings/errors
-            low =stripped .lower ()
-            if not applied and (low .startswith ('warning') or ' warn ' in f' {low} '):
-                widget .insert (tk .END ,line +"\n",('warn',))
-                applied =True 
-            if not applied and (low .startswith ('error') or ' failed' in low or ' not found' in low ):
-                widget .insert (tk .END ,line +"\n",('error',))
-                applied =True 
-            if not applied :
-                widget .insert (tk .END ,line +"\n")
+        self ._jf_sink .write (text )
+
+    def _apply_log_limit (self ):
+        try :
+            n =max (100 ,int (self .log_max_lines .get ()))
+        except Exception :
+            n =5000 
+        for sink in (getattr (self ,'_out_sink',None ),getattr (self ,'_jf_sink',None )):
+            if sink is not None :
+                sink .max_lines =n 
 
         # ssh helpers
+    def _pool_key (self ):
+    # connections are reused only while ip/port/user/auth settings stay the same
+        pw =self .password .get ()if self .use_password .get ()else ""
+        return (
+        self .iphone_ip .get ().strip (),
+        int (self .iphone_port .get ()or 22 ),
+        self .username .get ().strip ()or 'root',
+        self .auth_choice .get (),
+        self .private_key_path .get ().strip (),
+        hashlib .sha256 (pw .encode ('utf-8')).hexdigest (),
+        )
+
     def _connect (self ):
+    # pooled client: close() releases it, the authenticated transport is kept alive
+        if paramiko is None :
+            raise RuntimeError ("Paramiko not installed. Please install dependencies from requirements.txt")
+        if not self .iphone_ip .get ().strip ():
+            raise ValueError ("iPhone IP is required")
+        return self ._ssh_pool .client (self ._pool_key (),self ._open_client )
+
+    def _open_client (self ):
         if paramiko is None :
             raise RuntimeError ("Paramiko not installed. Please install dependencies from requirements.txt")
         ip =self .iphone_ip .get ().strip ()
@@ -1392,74 +1405,19 @@ class IPAGui ((TkinterDnD .Tk if _DND_AVAILABLE else tk .Tk )):
 
 
     def _sftp_put (self ,client ,local_path ,remote_path ):
-        sftp =client .open_sftp ()
-        try :
-        # ensure remote directory exists
-            remote_dir =os .path .dirname (remote_path )
-            try :
-                sftp .stat (remote_dir )
-            except IOError :
-            # attempt to create directory path recursively simple approach
-                parts =remote_dir .strip ('/').split ('/')
-                cur =''
-                for p in parts :
-                    cur =cur +'/'+p 
-                    try :
-                        sftp .stat (cur )
-                    except IOError :
-                        try :
-                            sftp .mkdir (cur )
-                        except Exception :
-                            pass 
-            if not self .commands_only .get ():
-                self ._log (f"Uploading {local_path} -> {remote_path}")
-            sftp .put (local_path ,remote_path )
-        finally :
-            sftp .close ()
+    # resumable: a dropped connection continues from the verified .part instead of starting over
+        if not self .commands_only .get ():
+            self ._log (f"Uploading {local_path} -> {remote_path}")
+        resumable_put (client ,local_path ,remote_path ,
+        progress =self ._upload_progress_fn (os .path .basename (local_path )),log =self ._log )
 
     def _exec (self ,client ,command ,raw =False ,commands_only =False ,log_fn =None ):
     # commands_only: only log command line still executes command but suppresses outputs/exit code logs
         log =log_fn or self ._log 
         if commands_only or not raw :
             log (f"$ {command}")
-        stdin ,stdout ,stderr =client .exec_command (command )
-        chan =stdout .channel 
-        err_chan =stderr .channel 
-        # stream outputs in near real-time
-        out_buf =[]
-        err_buf =[]
-        while True :
-            any_data =False 
-            if chan .recv_ready ():
-                data =chan .recv (4096 )
-                if data :
-                    any_data =True 
-                    if not commands_only :
-                        try :
-                            text =data .decode (errors ='ignore')
-                        except Exception :
-                            text =str (data )
-                            # log chunks as they arrive
-                        log (text .rstrip ('\n'))
-                    else :
-                        out_buf .append (data )
-            if err_chan .recv_stderr_ready ():
-                datae =err_chan .recv_stderr (4096 )
-                if datae :
-                    any_data =True 
-                    if not commands_only :
-                        try :
-                            texte =datae .decode (errors ='ignore')
-                        except Exception :
-                            texte =str (datae )
-                        log (texte .rstrip ('\n'))
-                    else :
-                        err_buf .append (datae )
-            if chan .exit_status_ready ()and not chan .recv_ready ()and not err_chan .recv_stderr_ready ():
-                break 
-            if not any_data :
-                time .sleep (0.05 )
-        rc =chan .recv_exit_status ()
+            # output is streamed line by line, nothing is shown in commands-only mode
+        rc =run_command (client ,command ,on_output =None if commands_only else log )
         if not commands_only and not raw :
             log (f"[exit {rc}]")
         return rc 
@@ -1486,6 +1444,9 @@ class IPAGui ((TkinterDnD .Tk if _DND_AVAILABLE else tk .Tk )):
     def _on_uninstall_deb (self ):
         self ._run_with_icon_anim (self ._uninstall_deb_flow )
 
+    def _on_benchmark_transfer (self ):
+        self ._run_with_icon_anim (self ._benchmark_transfer_flow )
+
     def _on_save_jf_output (self ):
         try :
             path =filedialog .asksaveasfilename (title ="Save JAILFR3E Output",defaultextension =".log",filetypes =[["Log files","*.log"],["Text files","*.txt"],["All files","*.*"]])
@@ -1534,7 +1495,8 @@ class IPAGui ((TkinterDnD .Tk if _DND_AVAILABLE else tk .Tk )):
             for idx ,ipa in enumerate (ipa_list ,1 ):
                 try :
                     self ._jf_log (f"[{idx}/{len(ipa_list)}] Installing {os.path.basename(ipa)} …")
-                    self .ipa_path .set (ipa )
+                    # set on the tk thread so the variable traces don't touch widgets from here
+                    self ._ui .ask (self .ipa_path .set ,ipa )
                     self ._add_history (self ._ipa_history ,ipa )
                     self ._jailfree_install_flow ()
                     ok +=1 
@@ -1580,9 +1542,9 @@ class IPAGui ((TkinterDnD .Tk if _DND_AVAILABLE else tk .Tk )):
                 try :
                     name =self ._app_display_name (adir )
                     self ._jf_log (f"[{idx}/{len(app_dirs)}] Installing {name} …")
-                    self .app_dir_path .set (adir )
+                    self ._ui .ask (self .app_dir_path .set ,adir )
                     # ensure ipa is not used as a fallback
-                    self .ipa_path .set ("")
+                    self ._ui .ask (self .ipa_path .set ,"")
                     self ._add_history (self ._appdir_history ,adir )
                     self ._appdrop_install_flow ()
                     ok +=1 
@@ -1644,57 +1606,59 @@ class IPAGui ((TkinterDnD .Tk if _DND_AVAILABLE else tk .Tk )):
         try :
             app_dir =self .app_dir_path .get ().strip ()
             ipa =self .ipa_path .get ().strip ()
+            mode =self .ad_transfer_mode .get ()or "zip"
             tmpdir =tempfile .mkdtemp (prefix ="ix_ad_")
             cleanup_app_dir =False 
+            zip_local =None 
             try :
                 if not app_dir or not os .path .isdir (app_dir ):
                 # fallback: extract from ipa
                     if not ipa or not os .path .isfile (ipa ):
-                        messagebox .showerror ("Error","Select a .app folder or a valid .ipa file")
+                        self ._ui .call (messagebox .showerror ,"Error","Select a .app folder or a valid .ipa file")
                         return 
                     self ._add_history (self ._ipa_history ,ipa )
                     with zipfile .ZipFile (ipa ,'r')as z :
                         names =[n for n in z .namelist ()if n .startswith ('Payload/')and n .endswith ('.app/')]
                         if not names :
-                            messagebox .showerror ("Error","Could not locate .app in IPA (Payload/)")
+                            self ._ui .call (messagebox .showerror ,"Error","Could not locate .app in IPA (Payload/)")
                             return 
                         app_prefix =names [0 ]
-                        self ._jf_log (f"Extracting {app_prefix} from IPA...")
-                        for n in z .namelist ():
-                            if n .startswith (app_prefix ):
-                                z .extract (n ,path =tmpdir )
-                        app_dir =os .path .join (tmpdir ,app_prefix .replace ('/',os .sep ).rstrip (os .sep ))
-                        cleanup_app_dir =True 
-                        # zip the app directory using python zipfile more reliable than compress-archive
-                app_dir_name =os .path .basename (app_dir .rstrip (os .sep ))
-                app_base =app_dir_name [:-4 ]if app_dir_name .lower ().endswith ('.app')else app_dir_name 
-                zip_local =os .path .join (tmpdir ,f"{app_base}.zip")
-                self ._jf_log (f"Creating ZIP via Python: {zip_local}")
-                try :
-                    with zipfile .ZipFile (zip_local ,'w',compression =zipfile .ZIP_DEFLATED )as zf :
-                        root_len =len (os .path .dirname (app_dir .rstrip (os .sep )))
-                        for base ,dirs ,files in os .walk (app_dir ):
-                        # preserve directory structure
-                            rel_dir =base [root_len :].lstrip (os .sep ).replace (os .sep ,'/')
-                            if rel_dir and not rel_dir .endswith ('/'):
-                                rel_dir =rel_dir +'/'
-                                # write directory entries optional in zip but keeps empty dirs
-                            if rel_dir :
-                                zi =zipfile .ZipInfo (rel_dir )
-                                zf .writestr (zi ,'')
-                            for f in files :
-                                lp =os .path .join (base ,f )
-                                # compute relative path inside zip under top-level folder
-                                arcname =os .path .join (rel_dir ,f ).replace ('\\','/')
-                                try :
-                                    zf .write (lp ,arcname )
-                                except Exception as ex :
-                                    self ._jf_log (f"Zip warn: skip {lp}: {ex}")
-                                    # verify zip exists and non-empty
-                    if not os .path .exists (zip_local )or os .path .getsize (zip_local )==0 :
-                        raise RuntimeError ("ZIP not created or empty")
-                except Exception as ex :
-                    self ._jf_log (f"Zip error: {ex}")
+                        if mode =="tar":
+                        # tar is fed straight from the ipa members, nothing is extracted
+                            self ._appdrop_tar (zip_entries (z ,app_prefix ),os .path .basename (app_prefix .rstrip ('/')))
+                            return 
+                        if mode =="sync":
+                            self ._appdrop_sync (zip_entries (z ,app_prefix ),os .path .basename (app_prefix .rstrip ('/')))
+                            return 
+                        app_dir_name =os .path .basename (app_prefix .rstrip ('/'))
+                        app_base =app_dir_name [:-4 ]if app_dir_name .lower ().endswith ('.app')else app_dir_name 
+                        zip_local =os .path .join (tmpdir ,f"{app_base}.zip")
+                        # the ipa is already a zip: copy the compressed members under new names
+                        try :
+                            self ._jf_log (f"Repacking {app_prefix} from IPA (no recompression)...")
+                            count ,nbytes =repack_app_from_ipa (ipa ,app_prefix ,zip_local )
+                            self ._jf_log (f"Repacked {count} members, {nbytes / (1024 * 1024):.1f} MB")
+                        except Exception as ex :
+                            self ._jf_log (f"Raw repack not possible ({ex}), extracting instead...")
+                            zip_local =None 
+                        if zip_local is None :
+                            self ._jf_log (f"Extracting {app_prefix} from IPA...")
+                            for n in z .namelist ():
+                                if n .startswith (app_prefix ):
+                                    z .extract (n ,path =tmpdir )
+                            app_dir =os .path .join (tmpdir ,app_prefix .replace ('/',os .sep ).rstrip (os .sep ))
+                            cleanup_app_dir =True 
+                if zip_local is None :
+                    app_dir_name =os .path .basename (app_dir .rstrip (os .sep ))
+                    if mode =="tar":
+                        self ._appdrop_tar (dir_entries (app_dir ),app_dir_name )
+                        return 
+                    if mode =="sync":
+                        self ._appdrop_sync (dir_entries (app_dir ),app_dir_name )
+                        return 
+                    app_base =app_dir_name [:-4 ]if app_dir_name .lower ().endswith ('.app')else app_dir_name 
+                    zip_local =os .path .join (tmpdir ,f"{app_base}.zip")
+                    self ._build_app_zip (app_dir ,zip_local )
                 client =self ._connect ()
                 try :
                     remote_zip =f"/var/mobile/{app_base}.zip"
@@ -1704,12 +1668,6 @@ class IPAGui ((TkinterDnD .Tk if _DND_AVAILABLE else tk .Tk )):
                     self ._jf_log ("Checking free space (df -h)...")
                     _ =self ._exec (client ,"df -h /var/mobile /Applications /var/jb/Applications 2>/dev/null || df -h",raw =self .raw_output .get (),commands_only =self .commands_only .get (),log_fn =self ._jf_log )
                     # run remote steps
-                    post_step =""
-                    if not self .no_respring .get ():
-                        post_step =(
-                        f" && (killall SpringBoard || true) && "
-                        f"(if [ -x /usr/bin/uicache ]; then UC=/usr/bin/uicache; else UC=uicache; fi; su mobile -c \"$UC\" || sudo -u mobile \"$UC\")"
-                        )
                     chained =(
                     f"cd /var/mobile && "
                     f"if [ -d /var/jb/Applications ]; then DEST=/var/jb/Applications; else DEST=/Applications; fi; "
@@ -1717,7 +1675,7 @@ class IPAGui ((TkinterDnD .Tk if _DND_AVAILABLE else tk .Tk )):
                     f"rm -f {self._shell_quote(app_base + '.zip')} && "
                     f"mv {self._shell_quote(app_dir_name)} \"$DEST\"/ && "
                     f"chmod -R 755 \"$DEST\"/{self._shell_quote(app_dir_name)} && "
-                    f"chown -R mobile:mobile \"$DEST\"/{self._shell_quote(app_dir_name)}"+post_step 
+                    f"chown -R mobile:mobile \"$DEST\"/{self._shell_quote(app_dir_name)}"+self ._appdrop_post_step ()
                     )
                     rc =self ._exec (client ,chained ,raw =self .raw_output .get (),commands_only =self .commands_only .get (),log_fn =self ._jf_log )
                 finally :
@@ -1735,6 +1693,145 @@ class IPAGui ((TkinterDnD .Tk if _DND_AVAILABLE else tk .Tk )):
         except Exception as e :
             self ._jf_log (f"Error: {e}")
 
+    def _appdrop_post_step (self ):
+        if self .no_respring .get ():
+            return ""
+        return (
+        f" && (killall SpringBoard || true) && "
+        f"(if [ -x /usr/bin/uicache ]; then UC=/usr/bin/uicache; else UC=uicache; fi; su mobile -c \"$UC\" || sudo -u mobile \"$UC\")"
+        )
+
+    def _build_app_zip (self ,app_dir ,zip_local ):
+    # zip the app directory using python zipfile more reliable than compress-archive
+        self ._jf_log (f"Creating ZIP via Python: {zip_local}")
+        try :
+            t0 =time .monotonic ()
+            count ,in_bytes ,out_bytes =pack_app_dir (app_dir ,zip_local ,level =self ._zip_level (),on_warn =lambda m :self ._jf_log (f"Zip warn: {m}"))
+            if count ==0 or out_bytes ==0 :
+                raise RuntimeError ("ZIP not created or empty")
+            self ._jf_log (f"Zipped {count} entries, {in_bytes / (1024 * 1024):.1f} MB -> {out_bytes / (1024 * 1024):.1f} MB in {time.monotonic() - t0:.1f} s")
+        except Exception as ex :
+            self ._jf_log (f"Zip error: {ex}")
+
+    def _zip_level (self ):
+        try :
+            return max (0 ,min (9 ,int (self .zip_level .get ())))
+        except Exception :
+            return 6 
+
+    def _remote_apps_dir (self ,client ):
+        out =[]
+        run_command (client ,"if [ -d /var/jb/Applications ]; then echo /var/jb/Applications; else echo /Applications; fi",on_output =out .append )
+        dest ="".join (out ).strip ()
+        return dest if dest .startswith ('/')else "/Applications"
+
+    def _appdrop_tar (self ,entries ,app_dir_name ):
+    # one tar stream into tar -x on the device: no zip, no unzip/mv, no chmod pass
+        client =self ._connect ()
+        try :
+            dest =self ._remote_apps_dir (client )
+            target =f"{dest}/{app_dir_name}"
+            # replace the installed bundle instead of extracting over stale files
+            self ._exec (client ,f"rm -rf {self._shell_quote(target)}",raw =self .raw_output .get (),commands_only =self .commands_only .get (),log_fn =self ._jf_log )
+            self ._jf_log (f"Streaming {app_dir_name} as tar -> {dest} …")
+            stats =tar_upload (client ,entries ,dest ,app_dir_name ,progress =self ._upload_progress_fn (app_dir_name ),compress =bool (self .tar_compress .get ()))
+            if not self .commands_only .get ():
+                self ._jf_log (f"Uploaded {stats.summary()}")
+            chained =f"chown -R mobile:mobile {self._shell_quote(target)}"+self ._appdrop_post_step ()
+            self ._exec (client ,chained ,raw =self .raw_output .get (),commands_only =self .commands_only .get (),log_fn =self ._jf_log )
+        finally :
+            client .close ()
+
+    def _appdrop_sync (self ,entries ,app_dir_name ):
+    # rsync-style: compare with the installed bundle, send only what changed, drop what's gone
+        client =self ._connect ()
+        try :
+            dest =self ._remote_apps_dir (client )
+            target =f"{dest}/{app_dir_name}"
+            self ._jf_log (f"Listing {target} …")
+            remote =list_remote_tree (client ,target )
+            if remote is None :
+                self ._jf_log (f"{app_dir_name} is not on the device yet, sending everything")
+                remote ={}
+            send ,delete =sync_plan (entries ,remote )
+            changed =[e for e in send if not e .is_dir ]
+            unchanged =sum (1 for e in entries if not e .is_dir )-len (changed )
+            self ._jf_log (f"Sync: {len(changed)} changed ({sum(e.size for e in changed) / (1024 * 1024):.1f} MB), "
+            f"{len(delete)} removed, {unchanged} unchanged")
+            if delete :
+                if not self .commands_only .get ():
+                    for rel in delete [:20 ]:
+                        self ._jf_log (f"  - {rel}")
+                remove_remote_paths (client ,target ,delete )
+            if send :
+                stats =upload_entries (client ,send ,target ,progress =self ._upload_progress_fn (app_dir_name ),
+                concurrency =self ._upload_concurrency (),keep_mtime =True )
+                if not self .commands_only .get ():
+                    self ._jf_log (f"Uploaded {stats.summary()}")
+            if not send and not delete :
+                self ._jf_log ("Nothing to update")
+                return 
+            chained =f"chown -R mobile:mobile {self._shell_quote(target)}"+self ._appdrop_post_step ()
+            self ._exec (client ,chained ,raw =self .raw_output .get (),commands_only =self .commands_only .get (),log_fn =self ._jf_log )
+        finally :
+            client .close ()
+
+    def _benchmark_transfer_flow (self ):
+    # send the selected .app (or the ipa's .app) with each transport into a scratch dir and compare
+        try :
+            app_dir =self .app_dir_path .get ().strip ()
+            ipa =self .ipa_path .get ().strip ()
+            tmpdir =tempfile .mkdtemp (prefix ="ix_bench_")
+            try :
+                if not app_dir or not os .path .isdir (app_dir ):
+                    if not ipa or not os .path .isfile (ipa ):
+                        self ._ui .call (messagebox .showerror ,"Error","Select a .app folder or a valid .ipa file")
+                        return 
+                    with zipfile .ZipFile (ipa ,'r')as z :
+                        names =[n for n in z .namelist ()if n .startswith ('Payload/')and n .endswith ('.app/')]
+                        if not names :
+                            self ._ui .call (messagebox .showerror ,"Error","Could not locate .app in IPA (Payload/)")
+                            return 
+                        for n in z .namelist ():
+                            if n .startswith (names [0 ]):
+                                z .extract (n ,path =tmpdir )
+                        app_dir =os .path .join (tmpdir ,names [0 ].replace ('/',os .sep ).rstrip (os .sep ))
+                app_dir_name =os .path .basename (app_dir .rstrip (os .sep ))
+                entries =dir_entries (app_dir )
+                nfiles =sum (1 for e in entries if not e .is_dir )
+                mb =sum (e .size for e in entries )/(1024 *1024 )
+                bench ="/var/mobile/.isync-bench"
+                zip_local =os .path .join (tmpdir ,"bench.zip")
+                self ._jf_log (f"Benchmark: {app_dir_name}, {nfiles} files, {mb:.1f} MB")
+                results =[]
+                client =self ._connect ()
+                try :
+                    run_command (client ,f"rm -rf {bench}")
+                    t0 =time .monotonic ()
+                    upload_entries (client ,entries ,f"{bench}/sftp/{app_dir_name}",concurrency =self ._upload_concurrency ())
+                    results .append ((f"sftp x{self._upload_concurrency()}",time .monotonic ()-t0 ))
+                    t0 =time .monotonic ()
+                    self ._build_app_zip (app_dir ,zip_local )
+                    self ._sftp_put (client ,zip_local ,f"{bench}/zip/bench.zip")
+                    rc =run_command (client ,f"cd {bench}/zip && unzip -oq bench.zip")
+                    results .append (("zip"if rc in (0 ,1 )else f"zip (unzip exit {rc})",time .monotonic ()-t0 ))
+                    t0 =time .monotonic ()
+                    tar_upload (client ,entries ,f"{bench}/tar",app_dir_name ,compress =bool (self .tar_compress .get ()))
+                    results .append (("tar+gz"if self .tar_compress .get ()else "tar",time .monotonic ()-t0 ))
+                finally :
+                    try :
+                        run_command (client ,f"rm -rf {bench}")
+                    except Exception :
+                        pass 
+                    client .close ()
+                for name ,secs in results :
+                    secs =max (secs ,1e-6 )
+                    self ._jf_log (f"  {name:<12} {secs:7.1f} s  {mb / secs:7.2f} MB/s  {nfiles / secs:8.1f} files/s")
+            finally :
+                shutil .rmtree (tmpdir ,ignore_errors =True )
+        except Exception as e :
+            self ._jf_log (f"Error: {e}")
+
     def _uicache_mobile_flow (self ):
         try :
         # execute uicache as the mobile user
@@ -1751,20 +1848,20 @@ class IPAGui ((TkinterDnD .Tk if _DND_AVAILABLE else tk .Tk )):
             ]
             rc =self ._exec_local (ssh_cmd )
             if rc ==0 :
-                messagebox .showinfo ("Extras","uicache (as mobile) executed.")
+                self ._ui .call (messagebox .showinfo ,"Extras","uicache (as mobile) executed.")
             else :
-                messagebox .showerror ("Extras",f"uicache failed (exit {rc}). See Jailfree Output.")
+                self ._ui .call (messagebox .showerror ,"Extras",f"uicache failed (exit {rc}). See Jailfree Output.")
         except Exception as e :
             self ._jf_log (f"Error: {e}")
 
     def _install_deb_flow (self ):
         try :
         # pick a local deb file
-            path =filedialog .askopenfilename (title ="Select .deb file",filetypes =[("DEB packages","*.deb"),("All files","*.*")])
+            path =self ._ui .ask (filedialog .askopenfilename ,title ="Select .deb file",filetypes =[("DEB packages","*.deb"),("All files","*.*")])
             if not path :
                 return 
             if not os .path .isfile (path ):
-                messagebox .showerror ("Extras","Selected file does not exist.")
+                self ._ui .call (messagebox .showerror ,"Extras","Selected file does not exist.")
                 return 
             client =self ._connect ()
             try :
@@ -1782,9 +1879,9 @@ class IPAGui ((TkinterDnD .Tk if _DND_AVAILABLE else tk .Tk )):
                     rc =self ._exec (client ,c ,raw =self .raw_output .get (),commands_only =self .commands_only .get (),log_fn =self ._jf_log )
                     last_rc =rc 
                 if last_rc ==0 :
-                    messagebox .showinfo ("DEB Install","Install finished. You may need to respring.")
+                    self ._ui .call (messagebox .showinfo ,"DEB Install","Install finished. You may need to respring.")
                 else :
-                    messagebox .showerror ("DEB Install",f"Install finished with exit {last_rc}. See Jailfree Output.")
+                    self ._ui .call (messagebox .showerror ,"DEB Install",f"Install finished with exit {last_rc}. See Jailfree Output.")
             finally :
                 try :
                     client .close ()
@@ -1795,7 +1892,7 @@ class IPAGui ((TkinterDnD .Tk if _DND_AVAILABLE else tk .Tk )):
 
     def _install_deb_url_flow (self ):
         try :
-            url =simpledialog .askstring ("Install .deb from URL","Enter URL to .deb:")
+            url =self ._ui .ask (simpledialog .askstring ,"Install .deb from URL","Enter URL to .deb:")
             if not url :
                 return 
                 # download to temp
@@ -1820,9 +1917,9 @@ class IPAGui ((TkinterDnD .Tk if _DND_AVAILABLE else tk .Tk )):
                         rc =self ._exec (client ,c ,raw =self .raw_output .get (),commands_only =self .commands_only .get (),log_fn =self ._jf_log )
                         last_rc =rc 
                     if last_rc ==0 :
-                        messagebox .showinfo ("DEB Install","Install finished. You may need to respring.")
+                        self ._ui .call (messagebox .showinfo ,"DEB Install","Install finished. You may need to respring.")
                     else :
-                        messagebox .showerror ("DEB Install",f"Install finished with exit {last_rc}. See Jailfree Output.")
+                        self ._ui .call (messagebox .showerror ,"DEB Install",f"Install finished with exit {last_rc}. See Jailfree Output.")
                 finally :
                     try :
                         client .close ()
@@ -1838,16 +1935,16 @@ class IPAGui ((TkinterDnD .Tk if _DND_AVAILABLE else tk .Tk )):
 
     def _uninstall_deb_flow (self ):
         try :
-            pkg =simpledialog .askstring ("Uninstall package","Enter package id (e.g. com.example.pkg):")
+            pkg =self ._ui .ask (simpledialog .askstring ,"Uninstall package","Enter package id (e.g. com.example.pkg):")
             if not pkg :
                 return 
             client =self ._connect ()
             try :
                 rc =self ._exec (client ,f"dpkg -r {self._shell_quote(pkg)}",raw =self .raw_output .get (),commands_only =self .commands_only .get (),log_fn =self ._jf_log )
                 if rc ==0 :
-                    messagebox .showinfo ("Uninstall","Package removal finished. You may need to respring.")
+                    self ._ui .call (messagebox .showinfo ,"Uninstall","Package removal finished. You may need to respring.")
                 else :
-                    messagebox .showerror ("Uninstall",f"Removal finished with exit {rc}. See Jailfree Output.")
+                    self ._ui .call (messagebox .showerror ,"Uninstall",f"Removal finished with exit {rc}. See Jailfree Output.")
             finally :
                 try :
                     client .close ()
@@ -1859,6 +1956,10 @@ class IPAGui ((TkinterDnD .Tk if _DND_AVAILABLE else tk .Tk )):
     def _on_close (self ):
         try :
             self ._save_settings ()
+        except Exception :
+            pass 
+        try :
+            self ._ssh_pool .close_all ()
         except Exception :
             pass 
             # cleanup temp icon frames
@@ -1897,6 +1998,13 @@ class IPAGui ((TkinterDnD .Tk if _DND_AVAILABLE else tk .Tk )):
         self .ipa_path .set (data .get ('ipa_path',self .ipa_path .get ()))
         self .app_dir_path .set (data .get ('app_dir_path',self .app_dir_path .get ()))
         self .no_respring .set (bool (data .get ('no_respring',False )))
+        self .jf_transfer_mode .set (data .get ('jf_transfer_mode',self .jf_transfer_mode .get ()))
+        self .upload_concurrency .set (int (data .get ('upload_concurrency',self .upload_concurrency .get ())))
+        self .ad_transfer_mode .set (data .get ('ad_transfer_mode',self .ad_transfer_mode .get ()))
+        self .tar_compress .set (bool (data .get ('tar_compress',False )))
+        self .zip_level .set (int (data .get ('zip_level',self .zip_level .get ())))
+        self .log_max_lines .set (int (data .get ('log_max_lines',self .log_max_lines .get ())))
+        self ._apply_log_limit ()
         # apply to combos
         self ._refresh_combos ()
 
@@ -1914,6 +2022,12 @@ class IPAGui ((TkinterDnD .Tk if _DND_AVAILABLE else tk .Tk )):
         'ipa_path':self .ipa_path .get (),
         'app_dir_path':self .app_dir_path .get (),
         'no_respring':bool (self .no_respring .get ()),
+        'jf_transfer_mode':self .jf_transfer_mode .get (),
+        'upload_concurrency':self ._upload_concurrency (),
+        'ad_transfer_mode':self .ad_transfer_mode .get (),
+        'tar_compress':bool (self .tar_compress .get ()),
+        'zip_level':self ._zip_level (),
+        'log_max_lines':int (self .log_max_lines .get ()),
         }
         p =self ._settings_path ()
         with open (p ,'w',encoding ='utf-8')as f :
@@ -1944,7 +2058,7 @@ class IPAGui ((TkinterDnD .Tk if _DND_AVAILABLE else tk .Tk )):
                     base =os .path .splitext (os .path .basename (ipa ))[0 ]
                     app_base =base 
             if not app_base and not app_dir_name :
-                messagebox .showerror ("Extras","Could not infer app name. Select a .app or IPA first.")
+                self ._ui .call (messagebox .showerror ,"Extras","Could not infer app name. Select a .app or IPA first.")
                 return 
             client =self ._connect ()
             try :
@@ -1958,9 +2072,9 @@ class IPAGui ((TkinterDnD .Tk if _DND_AVAILABLE else tk .Tk )):
                 chained =" && ".join (parts )
                 rc =self ._exec (client ,chained ,raw =self .raw_output .get (),commands_only =self .commands_only .get (),log_fn =self ._jf_log )
                 if rc ==0 :
-                    messagebox .showinfo ("Extras","Leftovers cleaned.")
+                    self ._ui .call (messagebox .showinfo ,"Extras","Leftovers cleaned.")
                 else :
-                    messagebox .showerror ("Extras",f"Cleanup failed (exit {rc}). See Jailfree Output.")
+                    self ._ui .call (messagebox .showerror ,"Extras",f"Cleanup failed (exit {rc}). See Jailfree Output.")
             finally :
                 try :
                     client .close ()
@@ -1995,15 +2109,14 @@ class IPAGui ((TkinterDnD .Tk if _DND_AVAILABLE else tk .Tk )):
         try :
             ipa =self .ipa_path .get ().strip ()
             if not ipa or not os .path .isfile (ipa ):
-                messagebox .showerror ("Error","Select a valid .ipa file")
+                self ._ui .call (messagebox .showerror ,"Error","Select a valid .ipa file")
                 return 
             self ._add_history (self ._ipa_history ,ipa )
-            tmpdir =tempfile .mkdtemp (prefix ="ix_jf_")
-            app_dir_local =None 
+            mode =self .jf_transfer_mode .get ()or "stream"
+            tmpdir =tempfile .mkdtemp (prefix ="ix_jf_")if mode =="extract"else None 
             try :
-            # extract app from ipa zip
+            # find payload/<appname>app/ in the ipa zip
                 with zipfile .ZipFile (ipa ,'r')as z :
-                # find payload/<appname>app/
                     app_prefix =None 
                     for n in z .namelist ():
                         if n .startswith ('Payload/')and n .endswith ('.app/'):
@@ -2016,101 +2129,85 @@ class IPAGui ((TkinterDnD .Tk if _DND_AVAILABLE else tk .Tk )):
                                 app_prefix =n .split ('.app/')[0 ]+'.app/'
                                 break 
                     if not app_prefix :
-                        messagebox .showerror ("Error","Could not locate .app in IPA (looking under Payload/)")
+                        self ._ui .call (messagebox .showerror ,"Error","Could not locate .app in IPA (looking under Payload/)")
                         return 
-                    if not self .commands_only .get ():
-                        self ._jf_log (f"Extracting {app_prefix} from IPA...")
-                    for n in z .namelist ():
-                        if n .startswith (app_prefix ):
-                            z .extract (n ,path =tmpdir )
-                    app_dir_local =os .path .join (tmpdir ,app_prefix )
-                    # connect and ensure destination
-                client =self ._connect ()
-                try :
-                    remote_app_path ="/var/mobile/"+app_prefix # payload/<appname>app/
-                    remote_app_path =remote_app_path .rstrip ('/')
-                    # ensure base dir exists
-                    self ._exec (
-                    client ,
-                    "mkdir -p /var/mobile/Payload",
-                    raw =self .raw_output .get (),
-                    commands_only =self .commands_only .get (),
-                    log_fn =self ._jf_log 
-                    )
-                    # upload recursively
-                    if not self .commands_only .get ():
-                        self ._jf_log (f"Uploading .app to {remote_app_path} ...")
-                    self ._sftp_upload_dir (client ,app_dir_local ,remote_app_path )
-                    # fix ownership
-                    self ._exec (
-                    client ,
-                    f"chown -R mobile:mobile {self._shell_quote(remote_app_path)}",
-                    raw =self .raw_output .get (),
-                    commands_only =self .commands_only .get (),
-                    log_fn =self ._jf_log 
-                    )
-                    # respring then uicache as mobile
-                    self ._exec (client ,"su mobile -c 'killall SpringBoard'",raw =self .raw_output .get (),commands_only =self .commands_only .get (),log_fn =self ._jf_log )
-                    self ._exec (client ,"su mobile -c 'uicache'",raw =self .raw_output .get (),commands_only =self .commands_only .get (),log_fn =self ._jf_log )
-                    if not self .commands_only .get ()and not self .raw_output .get ():
-                        self ._jf_log ("Done! If you don't see the app, try rebooting.")
-                finally :
-                    client .close ()
+                    app_dir_local =None 
+                    if mode =="extract":
+                        if not self .commands_only .get ():
+                            self ._jf_log (f"Extracting {app_prefix} from IPA...")
+                        for n in z .namelist ():
+                            if n .startswith (app_prefix ):
+                                z .extract (n ,path =tmpdir )
+                        app_dir_local =os .path .join (tmpdir ,app_prefix )
+                        # connect and ensure destination
+                    client =self ._connect ()
+                    try :
+                        remote_app_path ="/var/mobile/"+app_prefix # payload/<appname>app/
+                        remote_app_path =remote_app_path .rstrip ('/')
+                        # ensure base dir exists
+                        self ._exec (
+                        client ,
+                        "mkdir -p /var/mobile/Payload",
+                        raw =self .raw_output .get (),
+                        commands_only =self .commands_only .get (),
+                        log_fn =self ._jf_log 
+                        )
+                        # upload recursively
+                        if not self .commands_only .get ():
+                            self ._jf_log (f"Uploading .app to {remote_app_path} ...")
+                        if app_dir_local :
+                            self ._sftp_upload_dir (client ,app_dir_local ,remote_app_path )
+                        elif mode =="tar":
+                        # one tar stream into tar -x, no per-file round trips
+                            stats =tar_upload (client ,zip_entries (z ,app_prefix ),"/var/mobile/Payload",os .path .basename (remote_app_path ),progress =self ._upload_progress_fn (os .path .basename (remote_app_path )),compress =bool (self .tar_compress .get ()))
+                            if not self .commands_only .get ():
+                                self ._jf_log (f"Uploaded {stats.summary()}")
+                        else :
+                        # stream members out of the zip, nothing is written locally
+                            stats =upload_entries (client ,zip_entries (z ,app_prefix ),remote_app_path ,progress =self ._upload_progress_fn (os .path .basename (remote_app_path )),concurrency =self ._upload_concurrency ())
+                            if not self .commands_only .get ():
+                                self ._jf_log (f"Uploaded {stats.summary()}")
+                                # fix ownership
+                        self ._exec (
+                        client ,
+                        f"chown -R mobile:mobile {self._shell_quote(remote_app_path)}",
+                        raw =self .raw_output .get (),
+                        commands_only =self .commands_only .get (),
+                        log_fn =self ._jf_log 
+                        )
+                        # respring then uicache as mobile
+                        self ._exec (client ,"su mobile -c 'killall SpringBoard'",raw =self .raw_output .get (),commands_only =self .commands_only .get (),log_fn =self ._jf_log )
+                        self ._exec (client ,"su mobile -c 'uicache'",raw =self .raw_output .get (),commands_only =self .commands_only .get (),log_fn =self ._jf_log )
+                        if not self .commands_only .get ()and not self .raw_output .get ():
+                            self ._jf_log ("Done! If you don't see the app, try rebooting.")
+                    finally :
+                        client .close ()
             finally :
-                try :
+                if tmpdir :
                     shutil .rmtree (tmpdir ,ignore_errors =True )
-                except Exception :
-                    pass 
         except Exception as e :
             if not self .commands_only .get ():
                 self ._jf_log (f"Error: {e}")
 
+    def _upload_progress_fn (self ,label ):
+    # status bar progress for long uploads, a few updates per second with rate and eta
+        def publish (pct ,rate ,eta ):
+            extra =format_rate (rate ,eta )
+            self ._set_status (f"Uploading {label}: {pct:.0f}%"+(f" ({extra})"if extra else ""))
+        return ProgressMeter (publish ,min_interval =0.25 )
+
     def _sftp_upload_dir (self ,client ,local_dir ,remote_dir ):
-        """Recursively upload a local directory to remote_dir using SFTP."""
-        sftp =client .open_sftp ()
+        """Recursively upload a local directory to remote_dir using parallel SFTP sessions."""
+        stats =upload_entries (client ,dir_entries (local_dir ),remote_dir ,progress =self ._upload_progress_fn (os .path .basename (remote_dir )),concurrency =self ._upload_concurrency ())
+        if not self .commands_only .get ():
+            self ._jf_log (f"Uploaded {stats.summary()}")
+        return stats 
+
+    def _upload_concurrency (self ):
         try :
-        # create root
-            try :
-                sftp .stat (remote_dir )
-            except IOError :
-            # recursively create
-                parts =remote_dir .strip ('/').split ('/')
-                cur =''
-                for p in parts :
-                    cur =cur +'/'+p 
-                    try :
-                        sftp .stat (cur )
-                    except IOError :
-                        try :
-                            sftp .mkdir (cur )
-                        except Exception :
-                            pass 
-            for root ,dirs ,files in os .walk (local_dir ):
-                rel =os .path .relpath (root ,local_dir ).replace ('\\','/')
-                rdir =remote_dir if rel =='.'else f"{remote_dir}/{rel}"
-                # ensure directory exists
-                try :
-                    sftp .stat (rdir )
-                except IOError :
-                    try :
-                        sftp .mkdir (rdir )
-                    except Exception :
-                        pass 
-                for d in dirs :
-                    rd =f"{rdir}/{d}"
-                    try :
-                        sftp .stat (rd )
-                    except IOError :
-                        try :
-                            sftp .mkdir (rd )
-                        except Exception :
-                            pass 
-                for f in files :
-                    lp =os .path .join (root ,f )
-                    rp =f"{rdir}/{f}"
-                    sftp .put (lp ,rp )
-        finally :
-            sftp .close ()
+            return max (1 ,min (16 ,int (self .upload_concurrency .get ())))
+        except Exception :
+            return 4 
 
             # actions
     def _on_install_click (self ):
@@ -2151,7 +2248,7 @@ class IPAGui ((TkinterDnD .Tk if _DND_AVAILABLE else tk .Tk )):
         try :
             ipa =self .ipa_path .get ().strip ()
             if not ipa or not os .path .isfile (ipa ):
-                messagebox .showerror ("Error","Select a valid .ipa file")
+                self ._ui .call (messagebox .showerror ,"Error","Select a valid .ipa file")
                 return 
                 # record ipa in history
             self ._add_history (self ._ipa_history ,ipa )
@@ -2159,34 +2256,61 @@ class IPAGui ((TkinterDnD .Tk if _DND_AVAILABLE else tk .Tk )):
             try :
                 remote_dir ="/var/mobile/ipas"
                 remote_path =f"{remote_dir}/"+os .path .basename (ipa )
-                # check if already present on device create dir if needed only upload when missing
+                # skip the upload only when the device already has these exact bytes
+                if not self .commands_only .get ():
+                    if self ._hash_cache .lookup (ipa )is None :
+                        self ._log (f"Hashing {os.path.basename(ipa)}...")
+                digest =self ._hash_cache .get (ipa )
+                size =os .path .getsize (ipa )
+                manifest_path =f"{remote_dir}/.isync-manifest.json"
                 sftp =client .open_sftp ()
                 try :
-                    try :
-                        sftp .stat (remote_path )
-                        # file exists skip upload
-                        if not self .commands_only .get ():
-                            self ._log (f"Remote exists, skipping upload: {remote_path}")
-                    except IOError :
-                    # ensure directory exists then upload
+                    def remote_size (path ):
                         try :
-                            sftp .stat (remote_dir )
+                            return sftp .stat (path ).st_size 
                         except IOError :
-                        # create recursively
-                            parts =remote_dir .strip ('/').split ('/')
-                            cur =''
-                            for p in parts :
-                                cur =cur +'/'+p 
-                                try :
-                                    sftp .stat (cur )
-                                except IOError :
-                                    try :
-                                        sftp .mkdir (cur )
-                                    except Exception :
-                                        pass 
+                            return None 
+
+                    manifest =load_manifest (sftp ,manifest_path )
+                    entry =manifest .get (os .path .basename (ipa ))or {}
+                    same =entry .get ('sha256')==digest and remote_size (remote_path )==size 
+                    if not same and not entry and remote_size (remote_path )==size :
+                    # uploaded before the manifest existed: let the device hash it
+                        same =remote_sha256 (client ,remote_path )==digest 
+                        if same :
+                            manifest [os .path .basename (ipa )]={'sha256':digest ,'size':size }
+                            try :
+                                save_manifest (sftp ,manifest_path ,manifest )
+                            except Exception :
+                                pass 
+                    if same :
                         if not self .commands_only .get ():
-                            self ._log (f"Uploading {ipa} -> {remote_path}")
-                        sftp .put (ipa ,remote_path )
+                            self ._log (f"Remote has identical content, skipping upload: {remote_path}")
+                    else :
+                        sftp_makedirs (sftp ,remote_dir )
+                        twin =None 
+                        for name ,info in manifest .items ():
+                            if (name !=os .path .basename (ipa )and info .get ('sha256')==digest 
+                            and remote_size (f"{remote_dir}/{name}")==size ):
+                                twin =f"{remote_dir}/{name}"
+                                break 
+                        if twin :
+                        # same bytes under another name: copy on the device instead of re-sending; not ln, the next upload would rewrite the shared inode
+                            if not self .commands_only .get ():
+                                self ._log (f"Identical IPA already on device ({twin}), copying")
+                            q_src ,q_dst =self ._shell_quote (twin ),self ._shell_quote (remote_path )
+                            if run_command (client ,f"cp -f {q_src} {q_dst}")!=0 :
+                                twin =None 
+                        if not twin :
+                            if not self .commands_only .get ():
+                                self ._log (f"Uploading {ipa} -> {remote_path}")
+                            resumable_put (client ,ipa ,remote_path ,
+                            progress =self ._upload_progress_fn (os .path .basename (ipa )),log =self ._log )
+                        manifest [os .path .basename (ipa )]={'sha256':digest ,'size':size }
+                        try :
+                            save_manifest (sftp ,manifest_path ,manifest )
+                        except Exception as ex :
+                            self ._log (f"Could not update upload manifest: {ex}")
                 finally :
                     sftp .close ()
 
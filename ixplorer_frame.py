@@ -1,6 +1,9 @@
+import collections 
 import os 
+import posixpath 
 import stat 
 import threading 
+import time 
 import subprocess 
 import shutil 
 from datetime import datetime 
@@ -13,28 +16,108 @@ try :
 except Exception :
     paramiko =None 
 
+from remote_index import RemoteIndex 
+from sftp_transfer import ProgressMeter ,delete_remote ,format_rate ,list_remote_tree 
+from transfer_queue import TransferItem ,TransferQueueFrame 
+from ui_dispatch import UIDispatcher 
+
+
+class DirCache :
+    """Directory listings by remote path with a ttl, least recently used dropped first. Thread-safe."""
+
+    def __init__ (self ,ttl =30.0 ,max_dirs =256 ):
+        self .ttl =ttl 
+        self .max_dirs =max_dirs 
+        self ._lock =threading .Lock ()
+        self ._dirs =collections .OrderedDict ()# path -> (time, rows)
+
+    def get (self ,path ):
+        with self ._lock :
+            hit =self ._dirs .get (path )
+            if hit is None :
+                return None 
+            if time .monotonic ()-hit [0 ]>self .ttl :
+                del self ._dirs [path ]
+                return None 
+            self ._dirs .move_to_end (path )
+            return hit [1 ]
+
+    def put (self ,path ,rows ):
+        with self ._lock :
+            self ._dirs [path ]=(time .monotonic (),rows )
+            self ._dirs .move_to_end (path )
+            while len (self ._dirs )>self .max_dirs :
+                self ._dirs .popitem (last =False )
+
+    def invalidate (self ,path ,recursive =False ):
+        path =path .rstrip ('/')or '/'
+        with self ._lock :
+            self ._dirs .pop (path ,None )
+            if recursive :
+                prefix =path .rstrip ('/')+'/'
+                for p in [p for p in self ._dirs if p .startswith (prefix )]:
+                    del self ._dirs [p ]
+
+    def clear (self ):
+        with self ._lock :
+            self ._dirs .clear ()
+
 
 class ExplorerFrame (ttk .Frame ):
     """
     Remote file explorer over SSH/SFTP.
     Expects:
-      - get_connection: callable returning a connected paramiko.SSHClient
+      - get_connection: callable returning a connected client (pooled and shared
+        with the other tabs; close() only releases it)
       - ip_var: tk.StringVar with current device IP (used for scp.exe)
+      - dispatcher: optional ui_dispatch.UIDispatcher shared with the app
     """
 
-    def __init__ (self ,parent ,get_connection ,ip_var :tk .StringVar ):
+    # rows inserted per tick while filling the tree
+    CHUNK_ROWS =400 
+    # above this many entries only the rows in view exist in the tree
+    VIRTUAL_ROWS =5000 
+
+    def __init__ (self ,parent ,get_connection ,ip_var :tk .StringVar ,dispatcher =None ):
         super ().__init__ (parent )
         self .get_connection =get_connection 
         self .ip_var =ip_var 
+        # shared with the main window when given; workers only touch widgets through it
+        self ._ui =dispatcher or UIDispatcher (self )
 
         self .current_path =tk .StringVar (value ="/")
         self .status_var =tk .StringVar (value ="Disconnected")
         self .progress_var =tk .DoubleVar (value =0.0 )
+        # throughput/eta of the transfer queue as a whole
+        self .rate_var =tk .StringVar (value ="")
+        self ._meter =None 
+        self ._meter_done =0 
         self .use_scp =tk .BooleanVar (value =False )
+        # concurrent sftp transfers in the queue panel
+        self .parallel_var =tk .IntVar (value =4 )
         self .scp_path =tk .StringVar (value =self ._find_scp_path ())
 
         self ._client =None 
         self ._sftp =None 
+        # listings of visited and prefetched folders, invalidated by our own changes
+        self ._dircache =DirCache ()
+        self ._prefetch_gen =0 
+
+        # current listing as (name, is_dir, size, mtime); tree iids are indexes into it
+        self ._rows =[]
+        self ._sort_col ='display'
+        self ._sort_desc =False 
+        self ._fill_gen =0 
+        self ._virtual =False 
+        self ._vstart =0 
+        self ._vsel =set ()
+        # name to select once the next listing arrives (search results)
+        self ._reveal =None 
+
+        # file search: a per-device index, built and refreshed on demand
+        self .search_var =tk .StringVar (value ="")
+        self ._index =None 
+        self ._index_busy =False 
 
         self ._build_ui ()
         self ._connect_and_list (initial =True )
@@ -49,8 +132,13 @@ class ExplorerFrame (ttk .Frame ):
         path_entry .pack (side =tk .LEFT ,padx =6 )
         path_entry .bind ('<Return>',lambda e :self ._list_dir ())
         ttk .Button (bar ,text ="Up",command =self ._go_up ).pack (side =tk .LEFT ,padx =4 )
-        ttk .Button (bar ,text ="Refresh",command =self ._list_dir ).pack (side =tk .LEFT ,padx =4 )
+        ttk .Button (bar ,text ="Refresh",command =lambda :self ._list_dir (force =True )).pack (side =tk .LEFT ,padx =4 )
         ttk .Button (bar ,text ="Connect",command =lambda :self ._connect_and_list (force =True )).pack (side =tk .LEFT ,padx =10 )
+        ttk .Label (bar ,text ="Find:").pack (side =tk .LEFT )
+        find_entry =ttk .Entry (bar ,textvariable =self .search_var ,width =24 )
+        find_entry .pack (side =tk .LEFT ,padx =4 )
+        find_entry .bind ('<Return>',lambda e :self ._on_search ())
+        ttk .Button (bar ,text ="Update Index",command =self ._update_index ).pack (side =tk .LEFT ,padx =4 )
 
         # options
         opts =ttk .LabelFrame (self ,text ="Transfer Options")
@@ -60,6 +148,8 @@ class ExplorerFrame (ttk .Frame ):
         scp_entry =ttk .Entry (opts ,textvariable =self .scp_path ,width =40 )
         scp_entry .pack (side =tk .LEFT ,padx =4 )
         ttk .Button (opts ,text ="Browse...",command =self ._choose_scp ).pack (side =tk .LEFT )
+        ttk .Label (opts ,text ="Parallel:").pack (side =tk .LEFT ,padx =(12 ,0 ))
+        ttk .Spinbox (opts ,from_ =1 ,to =16 ,width =4 ,textvariable =self .parallel_var ).pack (side =tk .LEFT ,padx =4 )
 
         # splitter: tree + actions
         mid =ttk .Frame (self )
@@ -67,21 +157,33 @@ class ExplorerFrame (ttk .Frame ):
 
         columns =("display","size","modified","type")
         self .tree =ttk .Treeview (mid ,columns =columns ,show ='headings')
-        self .tree .heading ('display',text ='Name')
+        self .tree .heading ('display',text ='Name',command =lambda :self ._sort_by ('display'))
         self .tree .column ('display',width =320 ,anchor =tk .W )
-        self .tree .heading ('size',text ='Size')
+        self .tree .heading ('size',text ='Size',command =lambda :self ._sort_by ('size'))
         self .tree .column ('size',width =80 ,anchor =tk .E )
-        self .tree .heading ('modified',text ='Modified')
+        self .tree .heading ('modified',text ='Modified',command =lambda :self ._sort_by ('modified'))
         self .tree .column ('modified',width =160 ,anchor =tk .W )
-        self .tree .heading ('type',text ='Type')
+        self .tree .heading ('type',text ='Type',command =lambda :self ._sort_by ('type'))
         self .tree .column ('type',width =90 ,anchor =tk .W )
         self .tree .pack (side =tk .LEFT ,fill =tk .BOTH ,expand =True )
 
         sb =ttk .Scrollbar (mid ,orient =tk .VERTICAL ,command =self .tree .yview )
         self .tree .configure (yscroll =sb .set )
         sb .pack (side =tk .LEFT ,fill =tk .Y )
+        self ._sb =sb 
 
         self .tree .bind ('<Double-1>',self ._on_double )
+        self .tree .bind ('<Return>',self ._on_double )
+        self .tree .bind ('<BackSpace>',lambda e :self ._go_up ())
+        self .tree .bind ('<<TreeviewSelect>>',self ._on_select )
+        # virtual mode scrolls by moving the window of materialized rows
+        self .tree .bind ('<Configure>',lambda e :self ._virtual and self ._render_window ())
+        self .tree .bind ('<MouseWheel>',lambda e :self ._vwheel (-1 if e .delta >0 else 1 ))
+        self .tree .bind ('<Button-4>',lambda e :self ._vwheel (-1 ))
+        self .tree .bind ('<Button-5>',lambda e :self ._vwheel (1 ))
+        for key ,delta in (('<Up>',-1 ),('<Down>',1 ),('<Prior>','page-'),('<Next>','page+'),
+        ('<Home>','home'),('<End>','end')):
+            self .tree .bind (key ,lambda e ,d =delta :self ._vkey (d ))
 
         # right actions
         actions =ttk .Frame (mid )
@@ -92,17 +194,22 @@ class ExplorerFrame (ttk .Frame ):
         ttk .Button (actions ,text ="New Folder",command =self ._on_mkdir ).pack (fill =tk .X ,pady =2 )
         ttk .Button (actions ,text ="Rename",command =self ._on_rename ).pack (fill =tk .X ,pady =2 )
 
+        # transfer queue
+        self .transfers =TransferQueueFrame (self ,self .get_connection ,workers_var =self .parallel_var ,
+        dispatcher =self ._ui ,on_idle =self ._on_transfers_idle ,on_progress =self ._on_transfers_progress )
+        self .transfers .pack (fill =tk .X ,padx =8 ,pady =4 )
+
         # status
         status =ttk .Frame (self )
         status .pack (fill =tk .X ,padx =8 ,pady =6 )
         self .pbar =ttk .Progressbar (status ,variable =self .progress_var ,maximum =100 )
         self .pbar .pack (side =tk .LEFT ,fill =tk .X ,expand =True ,padx =6 )
+        ttk .Label (status ,textvariable =self .rate_var ,width =22 ).pack (side =tk .LEFT ,padx =6 )
         ttk .Label (status ,textvariable =self .status_var ).pack (side =tk .LEFT ,padx =6 )
 
         # helpers
     def _set_status (self ,text ):
-        self .status_var .set (text )
-        self .update_idletasks ()
+        self ._ui .set (self .status_var ,text )
 
     def _find_scp_path (self ):
     # try common locations or path
@@ -121,7 +228,13 @@ class ExplorerFrame (ttk .Frame ):
 
     def _ensure_conn (self ):
         if self ._client and self ._sftp :
-            return True 
+            try :
+            # reopen the sftp channel if the pooled transport was replaced
+                if not self ._sftp .get_channel ().closed :
+                    return True 
+            except Exception :
+                pass 
+            self ._close ()
         try :
             self ._client =self .get_connection ()
             self ._sftp =self ._client .open_sftp ()
@@ -134,6 +247,7 @@ class ExplorerFrame (ttk .Frame ):
         def work ():
             if force :
                 self ._close ()
+                self ._dircache .clear ()
             ok =self ._ensure_conn ()
             if ok :
                 self ._set_status ("Connected")
@@ -154,32 +268,67 @@ class ExplorerFrame (ttk .Frame ):
         self ._sftp =None 
         self ._client =None 
 
-    def _list_dir (self ):
+    def _list_dir (self ,force =False ):
         def work ():
             if not self ._ensure_conn ():
                 return 
             path =self .current_path .get ()or '/'
             try :
-                entries =self ._sftp .listdir_attr (path )
-                rows =[]
-                for e in entries :
-                    mode =e .st_mode 
-                    is_dir =stat .S_ISDIR (mode )
-                    typ ='dir'if is_dir else 'file'
-                    size =e .st_size if not is_dir else ''
-                    mtime =datetime .fromtimestamp (e .st_mtime ).strftime ('%Y-%m-%d %H:%M')
-                    icon =self ._icon_for (e .filename ,typ )
-                    display =f"{icon} {e.filename}"
-                    # keep both display string and real name
-                    rows .append ((display ,size ,mtime ,typ ,e .filename ))
-                    # sort by type dirs first then real name
-                rows .sort (key =lambda r :(r [3 ]!='dir',r [4 ].lower ()))
+                cached =None if force else self ._dircache .get (self ._cache_key (path ))
+                rows =list (cached )if cached is not None else self ._read_dir (self ._sftp ,path )
+                self ._sort_rows (rows )
                 self ._populate_tree (rows )
-                self ._set_status (f"Listed {path}")
+                self ._set_status (f"Listed {path} ({len(rows)} items)"+(" (cached)"if cached is not None else ""))
+                self ._prefetch (path ,rows )
             except Exception as e :
                 self ._set_status (f"List failed: {e}")
         threading .Thread (target =work ,daemon =True ).start ()
 
+    def _cache_key (self ,path ):
+        return posixpath .normpath (path )if path .startswith ('/')else '/'+path 
+
+    def _read_dir (self ,sftp ,path ):
+        entries =sftp .listdir_attr (path )
+        # raw fields only: icons and dates are formatted when a row is inserted
+        rows =[(e .filename ,stat .S_ISDIR (e .st_mode or 0 ),e .st_size or 0 ,e .st_mtime or 0 )for e in entries ]
+        self ._dircache .put (self ._cache_key (path ),rows )
+        return list (rows )
+
+    def _prefetch (self ,path ,rows ,limit =40 ):
+        """List the subfolders of path in the background on a separate sftp session so opening one is instant."""
+        self ._prefetch_gen +=1 
+        gen =self ._prefetch_gen 
+        todo =[posixpath .join (path ,r [0 ])for r in rows if r [1 ]][:limit ]
+        todo =[p for p in todo if self ._dircache .get (self ._cache_key (p ))is None ]
+        client =self ._client 
+        if not todo or client is None :
+            return 
+
+        def work ():
+            sftp =None 
+            try :
+                sftp =client .open_sftp ()
+                for p in todo :
+                # the user moved on: stop
+                    if gen !=self ._prefetch_gen :
+                        return 
+                    try :
+                        self ._read_dir (sftp ,p )
+                    except Exception :
+                        pass 
+            except Exception :
+                pass 
+            finally :
+                if sftp is not None :
+                    try :
+                        sftp .close ()
+                    except Exception :
+                        pass 
+        threading .Thread (target =work ,daemon =True ).start ()
+
+    def _invalidate (self ,path ,recursive =False ):
+        self ._dircache .invalidate (self ._cache_key (path ),recursive =recursive )
+
     def _icon_for (self ,name :str ,typ :str )->str :
         if typ =='dir':
             return '📁'
@@ -210,12 +359,173 @@ class ExplorerFrame (ttk .Frame ):
         return mapping .get (ext ,'📄')
 
     def _populate_tree (self ,rows ):
-        def ui ():
-            self .tree .delete (*self .tree .get_children ())
-            for display ,size ,mtime ,typ ,realname in rows :
-            # store real filename in item text show icon+name in first column
-                self .tree .insert ('',tk .END ,text =realname ,values =(display ,size ,mtime ,typ ))
-        self .after (0 ,ui )
+        self ._ui .call (self ._show_rows ,rows )
+
+    def _sort_rows (self ,rows ):
+        col =self ._sort_col 
+        if col =='size':
+            key =lambda r :r [2 ]
+        elif col =='modified':
+            key =lambda r :r [3 ]
+        elif col =='type':
+            key =lambda r :(os .path .splitext (r [0 ])[1 ].lower (),r [0 ].lower ())
+        else :
+            key =lambda r :r [0 ].lower ()
+        rows .sort (key =key ,reverse =self ._sort_desc )
+        # folders stay on top in either direction
+        rows .sort (key =lambda r :not r [1 ])
+
+    def _sort_by (self ,col ):
+        if self ._sort_col ==col :
+            self ._sort_desc =not self ._sort_desc 
+        else :
+            self ._sort_col ,self ._sort_desc =col ,False 
+        for c ,text in (('display','Name'),('size','Size'),('modified','Modified'),('type','Type')):
+            self .tree .heading (c ,text =text +((' ▼'if self ._sort_desc else ' ▲')if c ==col else ''))
+        selected ={self ._rows [i ][0 ]for i in self ._selected_indexes ()}
+        rows =list (self ._rows )
+        self ._sort_rows (rows )
+        self ._show_rows (rows ,selected )
+
+    def _row_values (self ,row ):
+        name ,is_dir ,size ,mtime =row 
+        typ ='dir'if is_dir else 'file'
+        try :
+            when =datetime .fromtimestamp (mtime ).strftime ('%Y-%m-%d %H:%M')
+        except Exception :
+            when =''
+        return (f"{self._icon_for(name, typ)} {name}",''if is_dir else size ,when ,typ )
+
+    def _visible_rows (self ):
+        try :
+            height =int (ttk .Style (self ).lookup ('Treeview','rowheight')or 20 )
+        except Exception :
+            height =20 
+        h =self .tree .winfo_height ()
+        # heading row included; unmapped trees report 1
+        return max (10 ,h //height -1 )if h >1 else 30 
+
+    def _show_rows (self ,rows ,selected =()):
+        """Replace the tree contents: chunked inserts, or a virtual window for very large listings."""
+        self ._fill_gen +=1 
+        self ._rows =rows 
+        reveal ,self ._reveal =self ._reveal ,None 
+        if reveal :
+            selected ={reveal }
+        self ._vsel ={i for i ,r in enumerate (rows )if r [0 ]in selected }
+        target =min (self ._vsel )if reveal and self ._vsel else None 
+        self .tree .delete (*self .tree .get_children ())
+        self ._virtual =len (rows )>self .VIRTUAL_ROWS 
+        if self ._virtual :
+            self .tree .configure (yscroll =lambda *a :None )
+            self ._sb .configure (command =self ._vscroll )
+            self ._vstart =0 if target is None else target -self ._visible_rows ()//2 
+            self ._render_window ()
+            if target is not None and self .tree .exists (str (target )):
+                self .tree .focus (str (target ))
+            return 
+        self .tree .configure (yscroll =self ._sb .set )
+        self ._sb .configure (command =self .tree .yview )
+        # the rows in view first, the rest a slice per tick so the ui keeps responding
+        first =self ._visible_rows ()
+        if target is not None :
+        # a revealed row has to exist before it can be scrolled to
+            first =max (first ,target +1 )
+        self ._fill_chunk (self ._fill_gen ,0 ,first )
+        if target is not None :
+            self .tree .see (str (target ))
+            self .tree .focus (str (target ))
+
+    def _fill_chunk (self ,gen ,start ,count ):
+        if gen !=self ._fill_gen :
+            return 
+        end =min (len (self ._rows ),start +count )
+        for i in range (start ,end ):
+            self .tree .insert ('',tk .END ,iid =str (i ),text =self ._rows [i ][0 ],values =self ._row_values (self ._rows [i ]))
+        sel =[str (i )for i in self ._vsel if start <=i <end ]
+        if sel :
+            self .tree .selection_add (sel )
+        if end <len (self ._rows ):
+            self .after (1 ,self ._fill_chunk ,gen ,end ,self .CHUNK_ROWS )
+
+    def _render_window (self ):
+        n =len (self ._rows )
+        vis =self ._visible_rows ()
+        self ._vstart =max (0 ,min (self ._vstart ,n -vis ))
+        focus =self .tree .focus ()
+        self .tree .delete (*self .tree .get_children ())
+        end =min (n ,self ._vstart +vis )
+        for i in range (self ._vstart ,end ):
+            self .tree .insert ('',tk .END ,iid =str (i ),text =self ._rows [i ][0 ],values =self ._row_values (self ._rows [i ]))
+        sel =[str (i )for i in self ._vsel if self ._vstart <=i <end ]
+        if sel :
+            self .tree .selection_set (sel )
+        if focus and self .tree .exists (focus ):
+            self .tree .focus (focus )
+        if n :
+            self ._sb .set (self ._vstart /n ,end /n )
+
+    def _vscroll (self ,*args ):
+        n =len (self ._rows )
+        vis =self ._visible_rows ()
+        if args and args [0 ]=='moveto':
+            self ._vstart =int (float (args [1 ])*n )
+        elif args and args [0 ]=='scroll':
+            step =int (args [1 ])
+            self ._vstart +=step *(vis if args [2 ]=='pages'else 1 )
+        self ._render_window ()
+
+    def _vwheel (self ,direction ):
+        if not self ._virtual :
+            return None 
+        self ._vstart +=direction *3 
+        self ._render_window ()
+        return "break"
+
+    def _vkey (self ,delta ):
+    # the tree only holds the window: move focus through the full listing ourselves
+        if not self ._virtual or not self ._rows :
+            return None 
+        n =len (self ._rows )
+        vis =self ._visible_rows ()
+        cur =int (self .tree .focus ()or self ._vstart )
+        if delta =='home':
+            new =0 
+        elif delta =='end':
+            new =n -1 
+        elif delta in ('page-','page+'):
+            new =cur +(vis if delta =='page+'else -vis )
+        else :
+            new =cur +delta 
+        new =max (0 ,min (n -1 ,new ))
+        if new <self ._vstart :
+            self ._vstart =new 
+        elif new >=self ._vstart +vis :
+            self ._vstart =new -vis +1 
+        self ._vsel ={new }
+        self ._render_window ()
+        self .tree .focus (str (new ))
+        return "break"
+
+    def _on_select (self ,_ =None ):
+        if not self ._virtual :
+            return 
+        shown ={int (i )for i in self .tree .get_children ()}
+        self ._vsel =(self ._vsel -shown )|{int (i )for i in self .tree .selection ()}
+
+    def _selected_indexes (self ):
+        if self ._virtual :
+            return sorted (self ._vsel )
+        return sorted (int (i )for i in self .tree .selection ())
+
+    def _selected_entries (self ):
+        """(name, 'dir' or 'file') for every selected row, including rows scrolled out of a virtual view."""
+        out =[]
+        for i in self ._selected_indexes ():
+            if i <len (self ._rows ):
+                name ,is_dir =self ._rows [i ][0 ],self ._rows [i ][1 ]
+                out .append ((name ,'dir'if is_dir else 'file'))
+        return out 
 
     def _on_double (self ,_ ):
         item =self .tree .focus ()
@@ -247,7 +557,7 @@ class ExplorerFrame (ttk .Frame ):
         self ._transfer_many (files ,dest_dir ,upload =True )
 
     def _on_download (self ):
-        sel =self .tree .selection ()
+        sel =self ._selected_entries ()
         if not sel :
             messagebox .showinfo ("Download","Select file(s) to download.")
             return 
@@ -255,57 +565,85 @@ class ExplorerFrame (ttk .Frame ):
         if not local_dir :
             return 
         items =[]
-        for it in sel :
-            vals =self .tree .item (it ,'values')
-            typ =vals [3 ]if len (vals )>3 else 'file'
-            name =self .tree .item (it ,'text')or ''
+        folders =[]
+        for name ,typ in sel :
             if typ =='dir':
-                messagebox .showwarning ("Download",f"Skipping folder: {name}")
+                folders .append ((posixpath .join (self .current_path .get ()or '/',name ),os .path .join (local_dir ,name )))
                 continue 
             items .append ((os .path .join (self .current_path .get ()or '/',name ),os .path .join (local_dir ,name )))
-        if not items :
+        if self ._scp_selected ():
+        # files and folders (-r) in one scp run
+            threading .Thread (target =self ._scp_download ,args =(items ,folders ),daemon =True ).start ()
             return 
-        self ._download_many (items )
+        if items :
+            self ._download_many (items )
+        if folders :
+            threading .Thread (target =self ._download_folders ,args =(folders ,),daemon =True ).start ()
+
+    def _download_folders (self ,folders ):
+    # one find listing per folder, then only new or changed files go to the transfer queue
+        if not self ._ensure_conn ():
+            return 
+        queued =[]
+        skipped =0 
+        for remote_dir ,local_root in folders :
+            self ._set_status (f"Listing {remote_dir}…")
+            try :
+                tree =list_remote_tree (self ._client ,remote_dir ,sftp =self ._sftp ,links =False )
+            except Exception as e :
+                self ._set_status (f"List failed: {e}")
+                continue 
+            if tree is None :
+                continue 
+            os .makedirs (local_root ,exist_ok =True )
+            for rel ,(is_dir ,size ,mtime )in sorted (tree .items ()):
+                local_path =os .path .join (local_root ,*rel .split ('/'))
+                if is_dir :
+                    os .makedirs (local_path ,exist_ok =True )
+                    continue 
+                try :
+                    st =os .stat (local_path )
+                    # same size and mtime as last time: already have it
+                    if st .st_size ==size and int (st .st_mtime )==int (mtime ):
+                        skipped +=1 
+                        continue 
+                except OSError :
+                    pass 
+                os .makedirs (os .path .dirname (local_path ),exist_ok =True )
+                queued .append (TransferItem ('down',local_path ,f"{remote_dir.rstrip('/')}/{rel}",size ))
+        if queued :
+            self .transfers .enqueue (queued )
+        self ._set_status (f"Queued {len(queued)} file(s), {skipped} unchanged skipped")
 
     def _on_delete (self ):
-        sel =self .tree .selection ()
-        if not sel :
+        names =[name for name ,_ in self ._selected_entries ()]
+        if not names :
             return 
-        names =[self .tree .item (it ,'text')or ''for it in sel ]
         if not messagebox .askyesno ("Delete",f"Delete {len(names)} item(s)?"):
             return 
+        workers =self .parallel_var .get ()
         def work ():
             if not self ._ensure_conn ():
                 return 
             base =self .current_path .get ()or '/'
-            errs =[]
+            self ._set_status (f"Deleting {len(names)} item(s)…")
+            # one rm -rf exec when the device has a shell, parallel sftp otherwise
+            try :
+                count ,errs =delete_remote (self ._client ,[posixpath .join (base ,n )for n in names ],sftp =self ._sftp ,
+                concurrency =workers )
+            except Exception as e :
+                count ,errs =0 ,[str (e )]
+            self ._invalidate (base )
             for n in names :
-                rp =os .path .join (base ,n )
-                try :
-                    st =self ._sftp .stat (rp )
-                    if stat .S_ISDIR (st .st_mode ):
-                        self ._rmdir_recursive (rp )
-                    else :
-                        self ._sftp .remove (rp )
-                except Exception as e :
-                    errs .append (f"{n}: {e}")
+                self ._invalidate (posixpath .join (base ,n ),recursive =True )
             self ._list_dir ()
             if errs :
-                self ._set_status ("Delete done with errors")
-                messagebox .showerror ("Delete","\n".join (errs ))
+                self ._set_status (f"Deleted {count} entries, {len(errs)} error(s)")
+                self ._ui .call (messagebox .showerror ,"Delete","\n".join (errs [:30 ]))
             else :
-                self ._set_status ("Delete completed")
+                self ._set_status (f"Deleted {count} entries")
         threading .Thread (target =work ,daemon =True ).start ()
 
-    def _rmdir_recursive (self ,path ):
-        for e in self ._sftp .listdir_attr (path ):
-            rp =os .path .join (path ,e .filename )
-            if stat .S_ISDIR (e .st_mode ):
-                self ._rmdir_recursive (rp )
-            else :
-                self ._sftp .remove (rp )
-        self ._sftp .rmdir (path )
-
     def _on_mkdir (self ):
         name =self ._prompt ("New folder name:")
         if not name :
@@ -315,6 +653,7 @@ class ExplorerFrame (ttk .Frame ):
                 return 
             try :
                 self ._sftp .mkdir (os .path .join (self .current_path .get ()or '/',name ))
+                self ._invalidate (self .current_path .get ()or '/')
                 self ._set_status ("Folder created")
                 self ._list_dir ()
             except Exception as e :
@@ -335,6 +674,8 @@ class ExplorerFrame (ttk .Frame ):
             base =self .current_path .get ()or '/'
             try :
                 self ._sftp .rename (os .path .join (base ,old ),os .path .join (base ,new ))
+                self ._invalidate (base )
+                self ._invalidate (posixpath .join (base ,old ),recursive =True )
                 self ._set_status ("Renamed")
                 self ._list_dir ()
             except Exception as e :
@@ -343,102 +684,242 @@ class ExplorerFrame (ttk .Frame ):
 
         # transfers
     def _transfer_many (self ,files ,remote_dir ,upload =True ):
-        def work ():
-            if upload :
-                total =len (files )
-                done =0 
-                for f in files :
-                    self ._upload_one (f ,os .path .join (remote_dir ,os .path .basename (f )))
-                    done +=1 
-                    self ._progress (done ,total )
-                self ._set_status ("Upload completed")
-                self ._list_dir ()
-        threading .Thread (target =work ,daemon =True ).start ()
+        if upload and not self ._scp_selected ():
+        # sftp uploads go through the queue panel, several at a time
+            self .transfers .enqueue ([TransferItem ('up',f ,posixpath .join (remote_dir ,os .path .basename (f )))for f in files ])
+            return 
+        if upload :
+            threading .Thread (target =self ._scp_upload ,args =(list (files ),remote_dir ),daemon =True ).start ()
 
     def _download_many (self ,items ):
-        def work ():
-            total =len (items )
-            done =0 
-            for remote_path ,local_path in items :
-                self ._download_one (remote_path ,local_path )
-                done +=1 
-                self ._progress (done ,total )
-            self ._set_status ("Download completed")
-        threading .Thread (target =work ,daemon =True ).start ()
+        if not self ._scp_selected ():
+            self .transfers .enqueue ([TransferItem ('down',local_path ,remote_path )for remote_path ,local_path in items ])
+            return 
+        threading .Thread (target =self ._scp_download ,args =(list (items ),[]),daemon =True ).start ()
+
+    def _scp_selected (self ):
+        return bool (self .use_scp .get ()and self .scp_path .get ()and os .path .isfile (self .scp_path .get ()))
+
+    def _on_transfers_idle (self ):
+    # worker thread: the queue drained
+        self ._set_status ("Transfers finished")
+        for it in list (self .transfers .queue .items ):
+            if it .kind =='up'and it .state =='done':
+                self ._invalidate (posixpath .dirname (it .remote_path ))
+        self ._list_dir ()
+
+    def _on_transfers_progress (self ,done ,total ):
+    # Tk thread, once per queue refresh; a new meter when the queue's byte count starts over
+        if self ._meter is None or done <self ._meter_done :
+            self ._meter =ProgressMeter (self ._publish_progress )
+        self ._meter_done =done 
+        self ._meter (done ,total )
+
+    def _publish_progress (self ,pct ,rate ,eta ):
+        self ._ui .set (self .progress_var ,pct )
+        self ._ui .set (self .rate_var ,format_rate (rate ,eta ))
 
     def _progress (self ,done ,total ):
         pct =(done /max (total ,1 ))*100.0 
-        self .after (0 ,lambda :self .progress_var .set (pct ))
+        self ._ui .set (self .progress_var ,pct )
 
-    def _upload_one (self ,local_path ,remote_path ):
-    # try scpexe if requested
-        if self .use_scp .get ()and self .scp_path .get ()and os .path .isfile (self .scp_path .get ()):
-            try :
-                self ._run_scp (local_path ,f"{self.ip_var.get()}:{remote_path}")
-                return True 
-            except Exception as e :
-                self ._set_status (f"scp upload failed, fallback to SFTP: {e}")
-                # fallback to sftp
-        if not self ._ensure_conn ():
-            return False 
+        # scp: one process per batch, sharing a ControlMaster connection where OpenSSH supports it
+    def _scp_port (self ):
         try :
-            self ._sftp_put_with_progress (local_path ,remote_path )
-            return True 
+            if self ._client :
+                t =self ._client .get_transport ()
+                if t :
+                    return t .getpeername ()[1 ]
+        except Exception :
+            pass 
+        return 22 
+
+    def _scp_args (self ):
+        ip =self .ip_var .get ().strip ()
+        if not ip :
+            raise RuntimeError ("No target IP")
+        args =[self .scp_path .get (),"-r","-p","-P",str (self ._scp_port ())]
+        if os .name !='nt':
+        # Windows OpenSSH has no ControlMaster; elsewhere later batches skip the handshake
+            cm_dir =os .path .expanduser ('~/.iSync/ssh')
+            os .makedirs (cm_dir ,mode =0o700 ,exist_ok =True )
+            args +=["-o","ControlMaster=auto","-o",f"ControlPath={cm_dir}/cm-%r@%h-%p",
+            "-o","ControlPersist=120"]
+        return ip ,args 
+
+    def _run_scp_batch (self ,sources ,dst ):
+        """
+        One scp run for all sources. Returns {source: error} for the ones that failed:
+        scp keeps going after a per-file error and names the path in its message.
+        """
+        ip ,args =self ._scp_args ()
+        self ._set_status (f"scp: {len(sources)} item(s)…")
+        res =subprocess .run (args +list (sources )+[dst ],capture_output =True ,text =True )
+        if res .returncode ==0 :
+            return {}
+        failed ={}
+        unmatched =[]
+        for line in (res .stderr or res .stdout or '').splitlines ():
+            line =line .strip ()
+            if not line :
+                continue 
+            msg =line [5 :]if line .startswith ('scp: ')else line 
+            hits =[src for src in sources if src .split (':',1 )[-1 ]in msg ]
+            if hits :
+            # the longest match: /a/b must not also claim /a/bc
+                src =max (hits ,key =len )
+                failed [src ]=msg 
+            else :
+                unmatched .append (msg )
+        if not failed :
+        # nothing per file (connection refused, auth...): the whole batch failed
+            err ="; ".join (unmatched )or f"scp failed {res.returncode}"
+            failed ={src :err for src in sources }
+        return failed 
+
+    def _scp_upload (self ,files ,remote_dir ):
+        ip =self .ip_var .get ().strip ()
+        self ._progress (0 ,1 )
+        try :
+            failed =self ._run_scp_batch (files ,f"{ip}:{remote_dir.rstrip('/') or '/'}/")
         except Exception as e :
-            self ._set_status (f"Upload failed: {e}")
-            return False 
+            failed ={f :str (e )for f in files }
+        self ._progress (1 ,1 )
+        self ._invalidate (remote_dir )
+        if failed :
+        # whatever scp could not send goes through the sftp queue
+            self ._set_status (f"scp: {len(failed)} of {len(files)} failed, retrying over SFTP: {next(iter(failed.values()))}")
+            self .transfers .enqueue ([TransferItem ('up',f ,posixpath .join (remote_dir ,os .path .basename (f )))for f in failed ])
+        else :
+            self ._set_status (f"Uploaded {len(files)} item(s) with scp")
+            self ._list_dir ()
 
-    def _download_one (self ,remote_path ,local_path ):
-    # scpexe path form: user@ip:remote -> local
-        if self .use_scp .get ()and self .scp_path .get ()and os .path .isfile (self .scp_path .get ()):
+    def _scp_download (self ,items ,folders ):
+        """items and folders are (remote_path, local_path) pairs, grouped by local folder so each group is one scp."""
+        ip =self .ip_var .get ().strip ()
+        groups ={}
+        for remote_path ,local_path in items +folders :
+            groups .setdefault (os .path .dirname (local_path ),[]).append (remote_path )
+        self ._progress (0 ,1 )
+        retry_files =[]
+        retry_dirs =[]
+        folder_set ={r for r ,_ in folders }
+        for n ,(local_dir ,remotes )in enumerate (groups .items ()):
+            os .makedirs (local_dir ,exist_ok =True )
+            sources =[f"{ip}:{r}"for r in remotes ]
             try :
-                self ._run_scp (f"{self.ip_var.get()}:{remote_path}",local_path )
-                return True 
+                failed =self ._run_scp_batch (sources ,local_dir )
             except Exception as e :
-                self ._set_status (f"scp download failed, fallback to SFTP: {e}")
-        if not self ._ensure_conn ():
+                failed ={src :str (e )for src in sources }
+            for src ,err in failed .items ():
+                remote_path =src .split (':',1 )[1 ]
+                local_path =os .path .join (local_dir ,posixpath .basename (remote_path ))
+                (retry_dirs if remote_path in folder_set else retry_files ).append ((remote_path ,local_path ))
+            self ._progress (n +1 ,len (groups ))
+        if retry_files :
+            self .transfers .enqueue ([TransferItem ('down',local_path ,remote_path )for remote_path ,local_path in retry_files ])
+        if retry_dirs :
+            self ._download_folders (retry_dirs )
+        if retry_files or retry_dirs :
+            self ._set_status (f"scp: {len(retry_files) + len(retry_dirs)} item(s) failed, retrying over SFTP")
+        else :
+            self ._set_status (f"Downloaded {len(items) + len(folders)} item(s) with scp")
+
+        # file search
+    def _index_for_device (self ):
+        ip =(self .ip_var .get ()or '').strip ()or 'device'
+        path =os .path .join (os .path .expanduser ('~/.iSync/index'),f"{ip.replace(':', '_')}.sqlite")
+        if self ._index is None or self ._index .db_path !=path :
+            self ._index =RemoteIndex (path )
+        return self ._index 
+
+    def _run_index (self ,index ):
+        """Build or refresh the index on this worker thread; False when it could not run."""
+        if self ._index_busy or not self ._ensure_conn ():
             return False 
+        self ._index_busy =True 
         try :
-            self ._sftp_get_with_progress (remote_path ,local_path )
+            count ,built =index .info ()
+            verb ="Updating"if count else "Building"
+            self ._set_status (f"{verb} file index…")
+
+            def progress (stats ):
+                self ._set_status (f"{verb} file index… {stats.entries} entries, {stats.entries / max(stats.elapsed, 1e-6):.0f}/s")
+            stats =index .refresh (self ._client ,progress =progress )
+            self ._set_status (f"Index {'updated' if count else 'built'}: {stats.summary()}")
             return True 
         except Exception as e :
-            self ._set_status (f"Download failed: {e}")
+            self ._set_status (f"Index failed: {e}")
             return False 
+        finally :
+            self ._index_busy =False 
 
-    def _run_scp (self ,src ,dst ):
-    # uses the systems scp assumes key-based auth is configured on the device
-        ip =self .ip_var .get ().strip ()
-        if not ip :
-            raise RuntimeError ("No target IP")
-        scp =self .scp_path .get ()
-        # attempt to pass port if we can query it from an existing connection
-        port =22 
-        try :
-            if self ._client :
-                t =self ._client .get_transport ()
-                if t :
-                    port =t .getpeername ()[1 ]
-        except Exception :
-            pass 
-        args =[scp ,"-P",str (port ),src ,dst ]
-        self ._set_status ("scp running...")
-        res =subprocess .run (args ,capture_output =True ,text =True )
-        if res .returncode !=0 :
-            raise RuntimeError (res .stderr .strip ()or res .stdout .strip ()or f"scp failed {res.returncode}")
-
-    def _sftp_put_with_progress (self ,local_path ,remote_path ):
-        def cb (x ,y ):
-            pct =(x /max (y ,1 ))*100.0 
-            self .after (0 ,lambda :self .progress_var .set (pct ))
-        self ._set_status (f"Uploading {os.path.basename(local_path)}...")
-        self ._sftp .put (local_path ,remote_path ,callback =cb )
-
-    def _sftp_get_with_progress (self ,remote_path ,local_path ):
-        def cb (x ,y ):
-            pct =(x /max (y ,1 ))*100.0 
-            self .after (0 ,lambda :self .progress_var .set (pct ))
-        self ._set_status (f"Downloading {os.path.basename(remote_path)}...")
-        self ._sftp .get (remote_path ,local_path ,callback =cb )
+    def _update_index (self ):
+        index =self ._index_for_device ()
+        threading .Thread (target =self ._run_index ,args =(index ,),daemon =True ).start ()
+
+    def _on_search (self ):
+        query =self .search_var .get ().strip ()
+        if not query :
+            return 
+        index =self ._index_for_device ()
+
+        def work ():
+            if not index .info ()[0 ]and not self ._run_index (index ):
+                return 
+            t0 =time .perf_counter ()
+            try :
+                results =index .search (query )
+            except Exception as e :
+                self ._set_status (f"Search failed: {e}")
+                return 
+            ms =(time .perf_counter ()-t0 )*1000 
+            self ._set_status (f"{len(results)} matches for {query} ({ms:.0f} ms)")
+            self ._ui .call (self ._show_search_results ,query ,results )
+        threading .Thread (target =work ,daemon =True ).start ()
+
+    def _show_search_results (self ,query ,results ):
+        top =tk .Toplevel (self )
+        top .title (f"Find: {query}")
+        top .transient (self .winfo_toplevel ())
+        top .geometry ("720x360")
+        frame =ttk .Frame (top )
+        frame .pack (fill =tk .BOTH ,expand =True ,padx =6 ,pady =6 )
+        tree =ttk .Treeview (frame ,columns =("path","size","modified"),show ='headings')
+        tree .heading ('path',text =f"Path ({len(results)} matches)")
+        tree .column ('path',width =480 ,anchor =tk .W )
+        tree .heading ('size',text ='Size')
+        tree .column ('size',width =80 ,anchor =tk .E )
+        tree .heading ('modified',text ='Modified')
+        tree .column ('modified',width =140 ,anchor =tk .W )
+        tree .pack (side =tk .LEFT ,fill =tk .BOTH ,expand =True )
+        sb =ttk .Scrollbar (frame ,orient =tk .VERTICAL ,command =tree .yview )
+        tree .configure (yscroll =sb .set )
+        sb .pack (side =tk .LEFT ,fill =tk .Y )
+        for i ,(path ,is_dir ,size ,mtime )in enumerate (results ):
+            try :
+                when =datetime .fromtimestamp (mtime ).strftime ('%Y-%m-%d %H:%M')
+            except Exception :
+                when =''
+            tree .insert ('',tk .END ,iid =str (i ),values =(path +('/'if is_dir else ''),''if is_dir else size ,when ))
+
+        def go (_ =None ):
+            item =tree .focus ()
+            if item :
+                path ,is_dir =results [int (item )][0 ],results [int (item )][1 ]
+                self ._reveal_path (path ,is_dir )
+        tree .bind ('<Double-1>',go )
+        tree .bind ('<Return>',go )
+        ttk .Label (top ,text ="Double-click a result to show it in the browser").pack (anchor =tk .W ,padx =6 ,pady =(0 ,6 ))
+
+    def _reveal_path (self ,path ,is_dir ):
+        """Open a folder, or a file's folder with the file selected."""
+        if is_dir :
+            self .current_path .set (path )
+        else :
+            self ._reveal =posixpath .basename (path )
+            self .current_path .set (posixpath .dirname (path )or '/')
+        self ._list_dir ()
 
         # small prompt
     def _prompt (self ,title ,initial =""):
@@ -0,0 +1,209 @@
+import contextlib 
+import os 
+import posixpath 
+import sqlite3 
+import threading 
+import time 
+
+from ssh_pool import run_command 
+from sftp_transfer import _sh_quote 
+
+# / and the data partition: -xdev keeps find off /dev and other mounts, /private/var is its own volume on iOS
+INDEX_ROOTS =('/','/private/var')
+
+_SCHEMA ="""
+CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, lname TEXT NOT NULL, is_dir INTEGER, size INTEGER, mtime REAL) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS files_lname ON files (lname);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+
+def _parse (line ):
+# '%y %s %T@ %p'
+    parts =line .split (' ',3 )
+    if len (parts )!=4 or len (parts [0 ])!=1 or not parts [3 ].startswith ('/'):
+        return None 
+    try :
+        path =parts [3 ].rstrip ('/')or '/'
+        return (path ,posixpath .basename (path ).lower (),1 if parts [0 ]=='d'else 0 ,int (parts [1 ]),float (parts [2 ]))
+    except ValueError :
+        return None 
+
+
+class IndexStats :
+    def __init__ (self ):
+        self .entries =0 
+        self .bytes =0 
+        self .removed =0 
+        self .t0 =time .monotonic ()
+
+    @property 
+    def elapsed (self ):
+        return time .monotonic ()-self .t0 
+
+    def summary (self ):
+        dt =max (self .elapsed ,1e-6 )
+        text =(f"{self.entries} entries in {dt:.1f} s ({self.entries / dt:.0f} entries/s, "
+        f"{self.bytes / dt / (1024 * 1024):.1f} MB/s of listing)")
+        if self .removed :
+            text +=f", {self.removed} removed"
+        return text 
+
+
+class RemoteIndex :
+    """
+    Local SQLite index of a device's file tree, built from one streamed find -printf exec and
+    refreshed with -newermt since the last build. One connection per call, so any thread may use it.
+    """
+
+    def __init__ (self ,db_path ):
+        self .db_path =db_path 
+        os .makedirs (os .path .dirname (db_path )or '.',exist_ok =True )
+        self ._write_lock =threading .Lock ()
+        with self ._db ()as db :
+            db .executescript (_SCHEMA )
+
+    @contextlib .contextmanager 
+    def _db (self ):
+        """A connection for one call: committed (or rolled back) and closed on exit."""
+        db =sqlite3 .connect (self .db_path ,timeout =30 )
+        try :
+            db .execute ("PRAGMA journal_mode=WAL")
+            db .execute ("PRAGMA synchronous=NORMAL")
+            with db :
+                yield db 
+        finally :
+            db .close ()
+
+    def _meta (self ,db ,key ,value =None ):
+        if value is None :
+            row =db .execute ("SELECT value FROM meta WHERE key=?",(key ,)).fetchone ()
+            return row [0 ]if row else None 
+        db .execute ("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",(key ,str (value )))
+
+    def info (self ):
+        """(entry count, device time of the last build or refresh, or None)."""
+        with self ._db ()as db :
+            n =db .execute ("SELECT COUNT(*) FROM files").fetchone ()[0 ]
+            built =self ._meta (db ,'device_time')
+        return n ,(float (built )if built else None )
+
+    def _stream (self ,client ,command ,stats ,progress ,on_row ,on_child =None ):
+        """
+        Run a find command, rows go to on_row and 'c <path>' lines to on_child.
+        Returns (exit status, the device's `date +%s` from the first line, set of 'isync-*' marker lines).
+        """
+        state ={'now':None ,'last':0 ,'markers':set ()}
+
+        def on_line (text ):
+            for line in text .split ('\n'):
+                stats .bytes +=len (line )+1 
+                if state ['now']is None and line .strip ().isdigit ():
+                    state ['now']=int (line .strip ())
+                    continue 
+                if line .startswith ('isync-'):
+                    state ['markers'].add (line .strip ())
+                    continue 
+                if on_child and line .startswith ('c /'):
+                    on_child (line [2 :])
+                    continue 
+                row =_parse (line )
+                if row is None :
+                    continue 
+                on_row (row )
+                stats .entries +=1 
+                if progress and stats .entries -state ['last']>=20000 :
+                    state ['last']=stats .entries 
+                    progress (stats )
+        rc =run_command (client ,command ,on_output =on_line ,chunk_size =256 *1024 )
+        return rc ,state ['now'],state ['markers']
+
+    def build (self ,client ,roots =INDEX_ROOTS ,progress =None ):
+        """Full rebuild. progress(IndexStats) every 20k entries. Returns IndexStats."""
+        stats =IndexStats ()
+        q =' '.join (_sh_quote (r )for r in roots )
+        with self ._write_lock ,self ._db ()as db :
+            db .execute ("DELETE FROM files")
+            batch =[]
+
+            def on_row (row ):
+                batch .append (row )
+                if len (batch )>=5000 :
+                    db .executemany ("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)",batch )
+                    batch .clear ()
+            rc ,now ,_ =self ._stream (client ,f"date +%s; find {q} -xdev -printf '%y %s %T@ %p\\n' 2>/dev/null",stats ,progress ,
+            on_row )
+            if batch :
+                db .executemany ("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)",batch )
+            if not stats .entries :
+                raise RuntimeError (f"find returned nothing (exit {rc}); the device's find may lack -printf")
+            self ._meta (db ,'device_time',now or int (time .time ()))
+            self ._meta (db ,'roots','\n'.join (roots ))
+        return stats 
+
+    def refresh (self ,client ,progress =None ):
+        """
+        Incremental update: entries changed since the last run are upserted, and the children of changed
+        directories are re-listed so removed files drop out. Falls back to build() without a previous run.
+        """
+        n ,since =self .info ()
+        with self ._db ()as db :
+            roots =(self ._meta (db ,'roots')or '\n'.join (INDEX_ROOTS )).split ('\n')
+        if not n or not since :
+            return self .build (client ,roots ,progress )
+        stats =IndexStats ()
+        q =' '.join (_sh_quote (r )for r in roots )
+        # a little overlap covers clock granularity and writes during the previous run
+        t =int (since )-2 
+        changed =[]
+        children ={}
+
+        def on_child (path ):
+            children .setdefault (posixpath .dirname (path ),set ()).add (path )
+            # part 1: changed entries; part 2: every child of each changed directory, as 'c <dir>/<name>'.
+            # both only run after a probe: find's own errors are hidden and the loop's status is what comes back
+        cmd =(f"date +%s; if find / -maxdepth 0 -newermt @{t} >/dev/null 2>&1; then "
+        f"find {q} -xdev -newermt @{t} -printf '%y %s %T@ %p\\n' 2>/dev/null; "
+        f"find {q} -xdev -type d -newermt @{t} -print 2>/dev/null | while IFS= read -r d; do "
+        "ls -1A \"$d\" 2>/dev/null | while IFS= read -r n; do echo \"c ${d%/}/$n\"; done; done; "
+        "else echo isync-no-newermt; fi")
+        rc ,now ,markers =self ._stream (client ,cmd ,stats ,progress ,changed .append ,on_child )
+        if 'isync-no-newermt'in markers or rc is None or not now :
+        # find without -newermt (old BSD find), or the exec didn't run: nothing to go on but a full listing
+            return self .build (client ,roots ,progress )
+        for path ,_ ,is_dir ,_ ,_ in changed :
+        # a changed folder that is empty now prints no 'c' line, its old children still have to go
+            if is_dir :
+                children .setdefault (path ,set ())
+        with self ._write_lock ,self ._db ()as db :
+            db .executemany ("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)",changed )
+            for d ,present in children .items ():
+                prefix =d .rstrip ('/')+'/'
+                rows =db .execute ("SELECT path FROM files WHERE path > ? AND path < ?",(prefix ,prefix +'\uffff')).fetchall ()
+                for (p ,)in rows :
+                # direct children only; a removed folder takes its subtree along
+                    if '/'in p [len (prefix ):]or p in present :
+                        continue 
+                    db .execute ("DELETE FROM files WHERE path = ? OR (path > ? AND path < ?)",(p ,p +'/',p +'/\uffff'))
+                    stats .removed +=1 
+            self ._meta (db ,'device_time',now or int (time .time ()))
+        return stats 
+
+    def search (self ,query ,limit =500 ):
+        """
+        Glob (*, ?, [..]) or substring match, case-insensitive, on the file name; on the whole path
+        when the query contains a '/'. Returns [(path, is_dir, size, mtime)].
+        """
+        q =query .strip ().lower ()
+        if not q :
+            return []
+        col ="lower(path)"if '/'in q else "lname"
+        with self ._db ()as db :
+            if any (c in q for c in '*?['):
+                sql =f"SELECT path, is_dir, size, mtime FROM files WHERE {col} GLOB ? LIMIT ?"
+                args =(q ,limit )
+            else :
+                esc =q .replace ('\\','\\\\').replace ('%','\\%').replace ('_','\\_')
+                sql =f"SELECT path, is_dir, size, mtime FROM files WHERE {col} LIKE ? ESCAPE '\\' LIMIT ?"
+                args =(f"%{esc}%",limit )
+            return db .execute (sql ,args ).fetchall ()
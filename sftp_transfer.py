@@ -0,0 +1,861 @@
+import errno 
+import gzip 
+import hashlib 
+import json 
+import os 
+import posixpath 
+import queue 
+import stat 
+import tarfile 
+import threading 
+import time 
+
+try :
+    import paramiko 
+except ImportError :
+    paramiko =None 
+
+from ssh_pool import run_command 
+
+# large reads keep several sftp write requests in flight per file
+COPY_CHUNK =256 *1024 
+
+
+class SourceEntry :
+    """One file or directory to send, with a path relative to the transfer root."""
+
+    def __init__ (self ,relpath ,size =0 ,mode =None ,mtime =None ,opener =None ,is_dir =False ):
+        self .relpath =relpath 
+        self .size =size 
+        self .mode =mode 
+        self .mtime =mtime 
+        self .opener =opener 
+        self .is_dir =is_dir 
+
+    def open (self ):
+        return self .opener ()
+
+
+def zip_entries (zf ,prefix ):
+    """Entries for every member of an open ZipFile under prefix (e.g. 'Payload/X.app/'), read straight from the archive."""
+    entries =[]
+    dirs =set ()
+    for info in zf .infolist ():
+        name =info .filename 
+        if not name .startswith (prefix )or name ==prefix :
+            continue 
+        rel =name [len (prefix ):].rstrip ('/')
+        mode =(info .external_attr >>16 )&0o7777 or None 
+        try :
+            mtime =time .mktime (info .date_time +(0 ,0 ,-1 ))
+        except Exception :
+            mtime =None 
+        if info .is_dir ():
+            dirs .add (rel )
+            entries .append (SourceEntry (rel ,mode =mode ,mtime =mtime ,is_dir =True ))
+            continue 
+        entries .append (SourceEntry (rel ,info .file_size ,mode ,mtime ,opener =lambda i =info :zf .open (i )))
+        # some ipas omit directory members, add the implied parents
+    for e in list (entries ):
+        parent =posixpath .dirname (e .relpath )
+        while parent and parent not in dirs :
+            dirs .add (parent )
+            entries .append (SourceEntry (parent ,is_dir =True ))
+            parent =posixpath .dirname (parent )
+    return entries 
+
+
+def sftp_makedirs (sftp ,path ):
+    """mkdir -p over sftp."""
+    try :
+        sftp .stat (path )
+        return 
+    except IOError :
+        pass 
+    cur =''
+    for p in path .strip ('/').split ('/'):
+        cur =cur +'/'+p 
+        try :
+            sftp .stat (cur )
+        except IOError :
+            try :
+                sftp .mkdir (cur )
+            except Exception :
+                pass 
+
+
+def copy_to_remote (src ,dst ,on_bytes =None ):
+    """Copy a readable file object into an open SFTPFile with pipelined writes. Returns bytes sent."""
+    dst .set_pipelined (True )
+    sent =0 
+    while True :
+        buf =src .read (COPY_CHUNK )
+        if not buf :
+            break 
+        dst .write (buf )
+        sent +=len (buf )
+        if on_bytes :
+            on_bytes (len (buf ))
+    return sent 
+
+
+class TransferStats :
+    """Counters for one transfer run; summary() gives files/s and MB/s."""
+
+    def __init__ (self ):
+        self .files =0 
+        self .bytes =0 
+        self .started =time .monotonic ()
+        self .finished =None 
+
+    def stop (self ):
+        self .finished =time .monotonic ()
+
+    @property 
+    def elapsed (self ):
+        return max ((self .finished or time .monotonic ())-self .started ,1e-6 )
+
+    def summary (self ):
+        mb =self .bytes /(1024 *1024 )
+        return (f"{self.files} files, {mb:.1f} MB in {self.elapsed:.1f} s "
+        f"({self.files / self.elapsed:.1f} files/s, {mb / self.elapsed:.2f} MB/s)")
+
+
+def dir_entries (local_dir ):
+    """Entries for a local directory tree, paths relative to local_dir."""
+    entries =[]
+    for root ,dirs ,files in os .walk (local_dir ):
+        rel =os .path .relpath (root ,local_dir ).replace ('\\','/')
+        rel =''if rel =='.'else rel +'/'
+        for d in dirs :
+            entries .append (SourceEntry (rel +d ,is_dir =True ))
+        for f in files :
+            lp =os .path .join (root ,f )
+            try :
+                st =os .stat (lp )
+            except OSError :
+                continue 
+                # windows has no meaningful permission bits
+            mode =st .st_mode &0o7777 if os .name !='nt'else None 
+            entries .append (SourceEntry (rel +f ,st .st_size ,mode ,st .st_mtime ,opener =lambda p =lp :open (p ,'rb')))
+    return entries 
+
+
+def _sh_quote (s ):
+    return "'"+s .replace ("'","'\\''")+"'"
+
+
+def make_remote_dirs (client ,paths ,sftp =None ):
+    """Create all paths in one pre-pass: batched mkdir -p over exec, sftp mkdir as fallback."""
+    paths =sorted (set (paths ),key =lambda p :p .count ('/'))
+    batch =[]
+    size =0 
+    ok =True 
+    for p in paths +[None ]:
+        if p is not None :
+            batch .append (_sh_quote (p ))
+            size +=len (batch [-1 ])+1 
+        if batch and (p is None or size >32000 ):
+            try :
+                if run_command (client ,"mkdir -p "+" ".join (batch ))!=0 :
+                    ok =False 
+            except Exception :
+                ok =False 
+            batch =[]
+            size =0 
+    if ok or sftp is None or not paths :
+        return 
+    sftp_makedirs (sftp ,paths [0 ])
+    for p in paths [1 :]:
+        try :
+            sftp .mkdir (p )
+        except IOError :
+            pass 
+
+
+def upload_entries (client ,entries ,remote_root ,progress =None ,concurrency =4 ,keep_mtime =False ):
+    """
+    Send entries below remote_root using several sftp sessions on one transport.
+    Directories are created up front; files are sent largest first by a pool of workers,
+    each keeping its writes pipelined. progress(sent_bytes, total_bytes) is called per chunk.
+    keep_mtime stamps each file with its source mtime (needed by sync_plan on the next run).
+    Returns TransferStats.
+    """
+    stats =TransferStats ()
+    files =sorted ((e for e in entries if not e .is_dir ),key =lambda e :-e .size )
+    total =sum (e .size for e in files )
+    lock =threading .Lock ()
+    failed =[]
+    todo =queue .Queue ()
+    for e in files :
+        todo .put (e )
+
+    def on_bytes (n ):
+        with lock :
+            stats .bytes +=n 
+            sent =stats .bytes 
+        if progress :
+            progress (sent ,total )
+
+    def worker (sftp ):
+        try :
+            while not failed :
+                try :
+                    e =todo .get_nowait ()
+                except queue .Empty :
+                    return 
+                rp =f"{remote_root}/{e.relpath}"
+                with e .open ()as src ,sftp .open (rp ,'wb')as dst :
+                    copy_to_remote (src ,dst ,on_bytes )
+                    # keep the executable bit on the app binary and helper tools; no mode (windows, zip
+                    # without unix attrs) gets 0755 like tar_upload, or the binary lands 0644 and won't launch
+                    if not e .mode :
+                        dst .chmod (0o755 )
+                    elif e .mode &0o111 :
+                        dst .chmod (e .mode )
+                    if keep_mtime and e .mtime is not None :
+                        dst .utime ((int (e .mtime ),int (e .mtime )))
+                with lock :
+                    stats .files +=1 
+        except Exception as ex :
+            failed .append (ex )
+        finally :
+            try :
+                sftp .close ()
+            except Exception :
+                pass 
+
+    first =client .open_sftp ()
+    make_remote_dirs (client ,[remote_root ]+[f"{remote_root}/{e.relpath}"for e in entries if e .is_dir ],sftp =first )
+    sessions =[first ]
+    for _ in range (max (1 ,min (int (concurrency or 1 ),len (files )))-1 ):
+        try :
+            sessions .append (client .open_sftp ())
+        except Exception :
+        # server may cap sessions per connection, use what we got
+            break 
+    threads =[threading .Thread (target =worker ,args =(s ,),daemon =True )for s in sessions ]
+    for t in threads :
+        t .start ()
+    for t in threads :
+        t .join ()
+    stats .stop ()
+    if failed :
+        raise failed [0 ]
+    return stats 
+
+
+class _ChannelWriter :
+    """Write-only file object feeding a channel's stdin."""
+
+    def __init__ (self ,chan ):
+        self .chan =chan 
+
+    def write (self ,data ):
+        self .chan .sendall (data )
+        return len (data )
+
+    def flush (self ):
+        pass 
+
+
+class _CountingReader :
+    def __init__ (self ,f ,on_bytes ):
+        self .f =f 
+        self .on_bytes =on_bytes 
+
+    def read (self ,n =-1 ):
+        data =self .f .read (n )
+        if data :
+            self .on_bytes (len (data ))
+        return data 
+
+
+def tar_upload (client ,entries ,remote_dir ,arc_root ,progress =None ,compress =False ):
+    """
+    Stream entries as a single tar into `tar -x` on the device, extracting to remote_dir/arc_root.
+    One channel and no per-file round trips; permissions and mobile:mobile ownership travel in
+    the archive. compress=True gzips the stream at level 1. Returns TransferStats.
+    """
+    stats =TransferStats ()
+    files_total =sum (e .size for e in entries if not e .is_dir )
+    q =_sh_quote (remote_dir )
+    chan =client .open_session ()if hasattr (client ,'open_session')else client .get_transport ().open_session ()
+    out =[]
+    try :
+        chan .set_combine_stderr (True )
+        chan .exec_command (f"mkdir -p {q} && tar -x{'z' if compress else ''}f - -C {q}")
+
+        # drain output while sending so the remote side never stalls on a full window
+        def reader ():
+            while True :
+                data =chan .recv (32768 )
+                if not data :
+                    return 
+                out .append (data )
+        rt =threading .Thread (target =reader ,daemon =True )
+        rt .start ()
+
+        def on_bytes (n ):
+            stats .bytes +=n 
+            if progress :
+                progress (stats .bytes ,files_total )
+        sink =_ChannelWriter (chan )
+        gz =None 
+        if compress :
+            gz =gzip .GzipFile (fileobj =sink ,mode ='wb',compresslevel =1 )
+            sink =gz 
+        with tarfile .open (fileobj =sink ,mode ='w|',format =tarfile .GNU_FORMAT )as tf :
+            root =SourceEntry ('',is_dir =True )
+            for e in [root ]+sorted (entries ,key =lambda e :(not e .is_dir ,e .relpath )):
+                ti =tarfile .TarInfo (f"{arc_root}/{e.relpath}".rstrip ('/'))
+                ti .uid =ti .gid =501 
+                ti .uname =ti .gname ='mobile'
+                ti .mtime =int (e .mtime or time .time ())
+                if e .is_dir :
+                    ti .type =tarfile .DIRTYPE 
+                    ti .mode =e .mode or 0o755 
+                    tf .addfile (ti )
+                    continue 
+                    # no mode info (windows, bare zip members): match the old chmod -R 755
+                ti .mode =e .mode or 0o755 
+                ti .size =e .size 
+                with e .open ()as src :
+                    tf .addfile (ti ,_CountingReader (src ,on_bytes ))
+                stats .files +=1 
+        if gz is not None :
+            gz .close ()
+        chan .shutdown_write ()
+        rt .join ()
+        rc =chan .recv_exit_status ()
+    finally :
+        try :
+            chan .close ()
+        except Exception :
+            pass 
+    stats .stop ()
+    if rc !=0 :
+        tail =b''.join (out ).decode ('utf-8',errors ='ignore').strip ()[-400 :]
+        raise RuntimeError (f"remote tar failed (exit {rc}): {tail}")
+    return stats 
+
+
+def file_sha256 (path ,on_bytes =None ):
+    h =hashlib .sha256 ()
+    with open (path ,'rb')as f :
+        while True :
+            buf =f .read (COPY_CHUNK *4 )
+            if not buf :
+                break 
+            h .update (buf )
+            if on_bytes :
+                on_bytes (len (buf ))
+    return h .hexdigest ()
+
+
+class HashCache :
+    """
+    Local sha256 cache keyed by path + size + mtime, stored as json.
+    A file is only re-hashed after it changes on disk.
+    """
+
+    def __init__ (self ,path ,max_entries =500 ):
+        self .path =path 
+        self .max_entries =max_entries 
+        self ._lock =threading .Lock ()
+        self ._data =None 
+
+    def _load (self ):
+        if self ._data is None :
+            try :
+                with open (self .path ,'r',encoding ='utf-8')as f :
+                    self ._data =dict (json .load (f ))
+            except Exception :
+                self ._data ={}
+        return self ._data 
+
+    def _key (self ,path ):
+        st =os .stat (path )
+        return f"{os.path.abspath(path)}|{st.st_size}|{st.st_mtime_ns}"
+
+    def lookup (self ,path ):
+        """Cached digest or None, without hashing."""
+        with self ._lock :
+            return self ._load ().get (self ._key (path ))
+
+    def get (self ,path ):
+        key =self ._key (path )
+        with self ._lock :
+            digest =self ._load ().get (key )
+        if digest :
+            return digest 
+        digest =file_sha256 (path )
+        with self ._lock :
+            data =self ._load ()
+            data .pop (key ,None )
+            data [key ]=digest 
+            # dicts keep insertion order: drop the oldest entries
+            for old in list (data )[:-self .max_entries ]:
+                del data [old ]
+            try :
+                os .makedirs (os .path .dirname (self .path )or '.',exist_ok =True )
+                with open (self .path ,'w',encoding ='utf-8')as f :
+                    json .dump (data ,f )
+            except Exception :
+                pass 
+        return digest 
+
+
+def load_manifest (sftp ,path ):
+    """Remote {name: {"sha256": ..., "size": ...}} manifest, empty if missing or unreadable."""
+    try :
+        with sftp .open (path ,'r')as f :
+            data =json .loads (f .read ().decode ('utf-8'))
+        return data if isinstance (data ,dict )else {}
+    except Exception :
+        return {}
+
+
+def save_manifest (sftp ,path ,manifest ):
+    tmp =path +'.tmp'
+    with sftp .open (tmp ,'w')as f :
+        f .write (json .dumps (manifest ,indent =1 ,sort_keys =True ).encode ('utf-8'))
+    try :
+        sftp .posix_rename (tmp ,path )
+    except Exception :
+    # servers without the posix-rename extension
+        try :
+            sftp .remove (path )
+        except IOError :
+            pass 
+        sftp .rename (tmp ,path )
+
+
+def remote_sha256 (client ,path ):
+    """sha256 of a device file via sha256sum/shasum/openssl, or None when none of them is available."""
+    q =_sh_quote (path )
+    out =[]
+    rc =run_command (client ,f"sha256sum {q} 2>/dev/null || shasum -a 256 {q} 2>/dev/null || openssl dgst -sha256 -r {q}",
+    on_output =out .append )
+    if rc !=0 :
+        return None 
+    for line in "\n".join (out ).splitlines ():
+        word =line .strip ().split (' ',1 )[0 ].lower ()
+        if len (word )==64 and all (c in '0123456789abcdef'for c in word ):
+            return word 
+    return None 
+
+
+    # raised from a progress callback to stop a transfer on purpose
+class TransferCancelled (Exception ):
+    pass 
+
+
+    # bytes re-sent before the end of a partial when it can't be hashed on the device:
+    # pipelined writes may have landed out of order just before the drop
+_RESUME_MARGIN =8 *1024 *1024 
+_TAIL_CHECK =64 *1024 
+
+
+def _local_prefix_sha256 (path ,length ):
+    h =hashlib .sha256 ()
+    with open (path ,'rb')as f :
+        left =length 
+        while left >0 :
+            buf =f .read (min (COPY_CHUNK *4 ,left ))
+            if not buf :
+                break 
+            h .update (buf )
+            left -=len (buf )
+    return h .hexdigest ()
+
+
+def _source_tag (local_path ):
+# written next to the .part so a partial is only ever continued from the file that started it
+    st =os .stat (local_path )
+    return f"{st.st_size} {st.st_mtime_ns}"
+
+
+def _resume_offset (client ,sftp ,local_path ,part ,size ,tag ):
+    """Offset the .part file can be continued from, 0 when it is missing or doesn't match local_path."""
+    try :
+        have =sftp .stat (part ).st_size 
+    except IOError :
+        return 0 
+    if not have or have >size :
+        return 0 
+    try :
+        with sftp .open (part +'.src','r')as f :
+            if f .read (256 ).decode ('utf-8','ignore').strip ()!=tag :
+                return 0 
+    except IOError :
+        return 0 
+    digest =remote_sha256 (client ,part )
+    if digest is not None :
+        return have if digest ==_local_prefix_sha256 (local_path ,have )else 0 
+        # no hash tool on the device: keep what's safely before the end and spot-check the bytes there
+    offset =have -_RESUME_MARGIN 
+    if offset <=_TAIL_CHECK :
+        return 0 
+    with open (local_path ,'rb')as f ,sftp .open (part ,'r')as rf :
+        f .seek (offset -_TAIL_CHECK )
+        rf .seek (offset -_TAIL_CHECK )
+        if f .read (_TAIL_CHECK )!=rf .read (_TAIL_CHECK ):
+            return 0 
+    return offset 
+
+
+def _finish_part (sftp ,part ,remote_path ):
+    try :
+        sftp .posix_rename (part ,remote_path )
+    except Exception :
+        try :
+            sftp .remove (remote_path )
+        except IOError :
+            pass 
+        sftp .rename (part ,remote_path )
+    try :
+        sftp .remove (part +'.src')
+    except IOError :
+        pass 
+
+
+# remote or local errors another attempt won't fix
+_PERMANENT_ERRNOS ={errno .EACCES ,errno .EPERM ,errno .ENOENT ,errno .ENOTDIR ,errno .EISDIR ,errno .EROFS ,errno .ENOSPC }
+
+
+def _transient (ex ):
+    """True for a dropped connection or session (worth a retry), False for a refusal like a read-only or missing path."""
+    if isinstance (ex ,EOFError )or (paramiko is not None and isinstance (ex ,paramiko .SSHException )):
+        return True 
+    # socket errors, 'Socket is closed' and our own size check are OSErrors too
+    return isinstance (ex ,OSError )and getattr (ex ,'errno',None )not in _PERMANENT_ERRNOS 
+
+
+def resumable_put (client ,local_path ,remote_path ,progress =None ,retries =4 ,log =None ,sftp =None ):
+    """
+    Upload local_path to remote_path through remote_path + '.part', renamed into place when complete.
+    '.part.src' records the source's size and mtime; a partial left by any other file starts over.
+    A dropped connection is retried with backoff on a fresh sftp session and continues from the verified
+    end of the partial instead of from zero; an earlier run's partial is picked up the same way.
+    Permission and missing-path errors are raised at once.
+    progress(sent_bytes, total_bytes) as with sftp.put; it may raise TransferCancelled to stop
+    without retrying (the partial is kept for later). sftp: session for the first attempt, left open.
+    """
+    size =os .path .getsize (local_path )
+    tag =_source_tag (local_path )
+    part =remote_path +'.part'
+    attempt =0 
+    given =sftp 
+    while True :
+        sftp =given if attempt ==0 else None 
+        try :
+            if sftp is None :
+                sftp =client .open_sftp ()
+            sftp_makedirs (sftp ,posixpath .dirname (remote_path ))
+            offset =_resume_offset (client ,sftp ,local_path ,part ,size ,tag )
+            if offset and log :
+                log (f"Resuming {posixpath.basename(remote_path)} at {offset / 1048576:.1f} of {size / 1048576:.1f} MB")
+            if not offset :
+                with sftp .open (part +'.src','w')as f :
+                    f .write (tag .encode ('utf-8'))
+            sent ={'n':offset }
+
+            def on_bytes (n ):
+                sent ['n']+=n 
+                if progress :
+                    progress (sent ['n'],size )
+
+            with open (local_path ,'rb')as src ,sftp .open (part ,'r+'if offset else 'w')as dst :
+                if offset :
+                    src .seek (offset )
+                    dst .seek (offset )
+                    dst .truncate (offset )
+                copy_to_remote (src ,dst ,on_bytes )
+            if sftp .stat (part ).st_size !=size :
+                raise IOError (f"size mismatch after upload of {remote_path}")
+            _finish_part (sftp ,part ,remote_path )
+            return size 
+        except TransferCancelled :
+            raise 
+        except Exception as ex :
+            attempt +=1 
+            if attempt >retries or not _transient (ex ):
+                raise 
+            delay =min (2 **attempt ,30 )
+            if log :
+                log (f"Upload of {posixpath.basename(remote_path)} interrupted ({ex}), retry {attempt}/{retries} in {delay}s")
+            time .sleep (delay )
+        finally :
+            if sftp is not None and sftp is not given :
+                try :
+                    sftp .close ()
+                except Exception :
+                    pass 
+
+
+def list_remote_tree (client ,root ,sftp =None ,links =True ):
+    """
+    {relpath: (is_dir, size, mtime)} for everything below root, or None when root doesn't exist.
+    One find -printf exec; walks over sftp when the device's find lacks -printf.
+    links=False leaves symlinks out.
+    """
+    tree ={}
+    bad =[]
+
+    def on_line (line ):
+        parts =line .split (' ',3 )
+        if len (parts )!=4 or parts [0 ]not in ('d','f','l'):
+            bad .append (line )
+            return 
+        if parts [0 ]=='l'and not links :
+            return 
+        try :
+            tree [parts [3 ]]=(parts [0 ]=='d',int (parts [1 ]),float (parts [2 ]))
+        except ValueError :
+            bad .append (line )
+
+    q =_sh_quote (root )
+    rc =run_command (client ,f"[ -d {q} ] || exit 3; find {q} -mindepth 1 -printf '%y %s %T@ %P\\n'",on_output =on_line )
+    if rc ==3 :
+        return None 
+    if rc ==0 and not bad :
+        return tree 
+    own =sftp is None 
+    if own :
+        sftp =client .open_sftp ()
+    try :
+        try :
+            sftp .stat (root )
+        except IOError :
+            return None 
+        tree ={}
+        todo =['']
+        while todo :
+            rel =todo .pop ()
+            for a in sftp .listdir_attr (f"{root}/{rel}"if rel else root ):
+                child =f"{rel}/{a.filename}"if rel else a .filename 
+                is_dir =stat .S_ISDIR (a .st_mode or 0 )
+                if not links and stat .S_ISLNK (a .st_mode or 0 ):
+                    continue 
+                tree [child ]=(is_dir ,a .st_size or 0 ,float (a .st_mtime or 0 ))
+                if is_dir :
+                    todo .append (child )
+        return tree 
+    finally :
+        if own :
+            sftp .close ()
+
+
+def sync_plan (entries ,remote ):
+    """
+    Compare source entries with list_remote_tree output.
+    Returns (entries to send, remote relpaths to delete): new directories plus files whose size or
+    whole-second mtime differs, and remote paths that no longer exist locally or changed type.
+    """
+    local ={e .relpath :e for e in entries }
+    send =[]
+    for e in entries :
+        r =remote .get (e .relpath )
+        if e .is_dir :
+            if r is None or not r [0 ]:
+                send .append (e )
+        elif r is None or r [0 ]or r [1 ]!=e .size or e .mtime is None or abs (int (r [2 ])-int (e .mtime ))>1 :
+            send .append (e )
+    delete =[]
+    for rel in sorted (remote ):
+        e =local .get (rel )
+        if e is not None and e .is_dir ==remote [rel ][0 ]:
+            continue 
+            # children of a path already being removed go with it
+        if any (rel .startswith (d +'/')for d in delete ):
+            continue 
+        delete .append (rel )
+    return send ,delete 
+
+
+def remove_remote_paths (client ,root ,relpaths ):
+    """rm -rf relpaths below root in as few execs as the command line allows."""
+    batch =[]
+    size =0 
+    for rel in list (relpaths )+[None ]:
+        if rel is not None :
+            batch .append (_sh_quote (f"{root}/{rel}"))
+            size +=len (batch [-1 ])+1 
+        if batch and (rel is None or size >32000 ):
+            rc =run_command (client ,"rm -rf "+" ".join (batch ))
+            if rc !=0 :
+                raise RuntimeError (f"rm failed on the device (exit {rc})")
+            batch =[]
+            size =0 
+
+
+class ProgressMeter :
+    """
+    Byte-progress callback (same signature as paramiko's put/get callback, thread-safe) that only
+    publishes when min_interval seconds or min_step percent have passed, with a smoothed rate and ETA.
+    publish(percent, bytes_per_second, eta_seconds); rate and eta are None until known.
+    """
+
+    def __init__ (self ,publish ,min_interval =0.2 ,min_step =1.0 ,alpha =0.3 ):
+        self .publish =publish 
+        self .min_interval =min_interval 
+        self .min_step =min_step 
+        self .alpha =alpha 
+        self .rate =None 
+        self ._t0 =self ._last_t =time .monotonic ()
+        self ._done0 =0 
+        self ._last_done =0 
+        self ._last_pct =-100.0 
+        self ._lock =threading .Lock ()
+
+    def __call__ (self ,done ,total ):
+    # upload_entries reports from several workers: a busy meter just skips this one, except the final 100%
+        if not self ._lock .acquire (blocking =done >=total ):
+            return 
+        try :
+            self ._update (done ,total )
+        finally :
+            self ._lock .release ()
+
+    def _update (self ,done ,total ):
+        now =time .monotonic ()
+        if done <self ._last_done :
+        # a retry started over at a lower offset: measure again from here
+            self ._t0 =self ._last_t =now 
+            self ._done0 =self ._last_done =done 
+            self .rate =None 
+        pct =done *100.0 /max (total ,1 )
+        finished =done >=total 
+        if not finished and now -self ._last_t <self .min_interval and pct -self ._last_pct <self .min_step :
+            return 
+        dt =now -self ._last_t 
+        if dt >0 :
+            inst =max (0.0 ,(done -self ._last_done )/dt )
+            self .rate =inst if self .rate is None else self .alpha *inst +(1 -self .alpha )*self .rate 
+        if finished and now >self ._t0 :
+        # report the overall average at the end
+            self .rate =(done -self ._done0 )/(now -self ._t0 )
+        self ._last_t =now 
+        self ._last_done =done 
+        self ._last_pct =pct 
+        eta =(total -done )/self .rate if self .rate else None 
+        self .publish (pct ,self .rate ,eta )
+
+
+def format_rate (rate ,eta =None ):
+    """'12.3 MB/s, 0:42 left' style text for a status bar."""
+    if not rate :
+        return ""
+    text =f"{rate / (1024 * 1024):.1f} MB/s"
+    if eta is not None and eta >0.5 :
+        eta =int (eta +0.5 )
+        text +=f", {eta // 3600}:{eta // 60 % 60:02d}:{eta % 60:02d} left"if eta >=3600 else f", {eta // 60}:{eta % 60:02d} left"
+    return text 
+
+
+def _sftp_delete_parallel (client ,sftp ,paths ,concurrency ):
+    """Walk paths over sftp, then remove files and (deepest first) directories on several sessions."""
+    files =[]
+    levels ={}
+    errors =[]
+    for p in paths :
+        try :
+            st =sftp .lstat (p )
+        except IOError as ex :
+            errors .append (f"{p}: {ex}")
+            continue 
+        if not stat .S_ISDIR (st .st_mode or 0 ):
+            files .append (p )
+            continue 
+        todo =[p ]
+        while todo :
+            d =todo .pop ()
+            levels .setdefault (d .count ('/'),[]).append (d )
+            try :
+                for a in sftp .listdir_attr (d ):
+                    child =f"{d.rstrip('/')}/{a.filename}"
+                    if stat .S_ISDIR (a .st_mode or 0 ):
+                        todo .append (child )
+                    else :
+                        files .append (child )
+            except IOError as ex :
+                errors .append (f"{d}: {ex}")
+    sessions =[sftp ]
+    for _ in range (max (1 ,int (concurrency or 1 ))-1 ):
+        try :
+            sessions .append (client .open_sftp ())
+        except Exception :
+            break 
+    lock =threading .Lock ()
+    removed ={'n':0 }
+
+    def run (batch ,op ):
+    # several sessions keep that many requests in flight instead of one round trip at a time
+        todo =queue .Queue ()
+        for p in batch :
+            todo .put (p )
+
+        def worker (s ):
+            while True :
+                try :
+                    p =todo .get_nowait ()
+                except queue .Empty :
+                    return 
+                try :
+                    getattr (s ,op )(p )
+                    with lock :
+                        removed ['n']+=1 
+                except Exception as ex :
+                    with lock :
+                        errors .append (f"{p}: {ex}")
+        threads =[threading .Thread (target =worker ,args =(s ,),daemon =True )for s in sessions [:max (1 ,len (batch ))]]
+        for t in threads :
+            t .start ()
+        for t in threads :
+            t .join ()
+
+    try :
+        run (files ,'remove')
+        for depth in sorted (levels ,reverse =True ):
+            run (levels [depth ],'rmdir')
+    finally :
+        for s in sessions [1 :]:
+            try :
+                s .close ()
+            except Exception :
+                pass 
+    return removed ['n'],errors 
+
+
+def delete_remote (client ,paths ,sftp =None ,concurrency =4 ):
+    """
+    Recursively delete paths. One exec counts the entries with find and runs rm -rf on all of them;
+    without a usable shell it falls back to a parallel sftp delete.
+    Returns (entries removed, error strings).
+    """
+    paths =list (paths )
+    if not paths :
+        return 0 ,[]
+    q =' '.join (_sh_quote (p )for p in paths )
+    out =[]
+    try :
+        rc =run_command (client ,f"n=$(find {q} 2>/dev/null | wc -l); rm -rf -- {q} && echo \"isync-removed $n\"",
+        on_output =out .append )
+    except Exception :
+        rc =None 
+    for line in "\n".join (out ).splitlines ():
+        if rc ==0 and line .startswith ("isync-removed "):
+            try :
+                return int (line .split ()[1 ]),[]
+            except (IndexError ,ValueError ):
+            # removed, but the count came back empty (find or wc failed)
+                return 0 ,[]
+    own =sftp is None 
+    if own :
+        sftp =client .open_sftp ()
+    try :
+        return _sftp_delete_parallel (client ,sftp ,paths ,concurrency )
+    finally :
+        if own :
+            sftp .close ()
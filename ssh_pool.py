@@ -0,0 +1,144 @@
+import threading 
+
+
+class PooledClient :
+    """
+    Handle to a pooled SSH connection, usable where a paramiko.SSHClient is expected.
+    Every exec_command/open_sftp opens a new channel on the shared transport.
+    close() only releases the handle; the transport stays alive in the pool.
+    """
+
+    def __init__ (self ,pool ,key ,connect ):
+        self ._pool =pool 
+        self ._key =key 
+        self ._connect =connect 
+
+    def _client (self ):
+        return self ._pool ._acquire (self ._key ,self ._connect )
+
+    def _with_reconnect (self ,fn ):
+        client =self ._client ()
+        try :
+            return fn (client )
+        except Exception :
+        # transport died between the liveness check and the channel open
+            if self ._pool ._alive (client ):
+                raise 
+            self ._pool .invalidate (self ._key ,client )
+            return fn (self ._client ())
+
+    def exec_command (self ,command ,**kwargs ):
+        return self ._with_reconnect (lambda c :c .exec_command (command ,**kwargs ))
+
+    def open_sftp (self ):
+        return self ._with_reconnect (lambda c :c .open_sftp ())
+
+    def open_session (self ):
+        return self ._with_reconnect (lambda c :c .get_transport ().open_session ())
+
+    def get_transport (self ):
+        return self ._client ().get_transport ()
+
+    def close (self ):
+    # the transport belongs to the pool
+        pass 
+
+
+class SSHPool :
+    """
+    Keeps authenticated SSH transports alive between actions, keyed by (ip, port, user, auth).
+    connect callables passed to client() must return a freshly connected paramiko.SSHClient.
+    """
+
+    def __init__ (self ,keepalive =15 ):
+        self .keepalive =keepalive 
+        self ._lock =threading .Lock ()
+        self ._clients ={}# key -> paramiko.SSHClient
+        self ._key_locks ={}
+
+    def client (self ,key ,connect ):
+    # connect eagerly so callers see auth errors where they used to
+        self ._acquire (key ,connect )
+        return PooledClient (self ,key ,connect )
+
+    def _alive (self ,client ):
+        try :
+            t =client .get_transport ()
+            return t is not None and t .is_active ()
+        except Exception :
+            return False 
+
+    def _acquire (self ,key ,connect ):
+        with self ._lock :
+            klock =self ._key_locks .setdefault (key ,threading .Lock ())
+            # one handshake per key even if several tabs ask at once
+        with klock :
+            client =self ._clients .get (key )
+            if client is not None and self ._alive (client ):
+                return client 
+            if client is not None :
+                self ._drop (key ,client )
+            client =connect ()
+            try :
+                client .get_transport ().set_keepalive (self .keepalive )
+            except Exception :
+                pass 
+            with self ._lock :
+                self ._clients [key ]=client 
+            return client 
+
+    def _drop (self ,key ,client ):
+        with self ._lock :
+            if self ._clients .get (key )is client :
+                del self ._clients [key ]
+        try :
+            client .close ()
+        except Exception :
+            pass 
+
+    def invalidate (self ,key ,client =None ):
+        with self ._lock :
+            cur =self ._clients .get (key )
+        if cur is not None and (client is None or cur is client ):
+            self ._drop (key ,cur )
+
+    def close_all (self ):
+        with self ._lock :
+            items =list (self ._clients .items ())
+        for key ,client in items :
+            self ._drop (key ,client )
+
+
+def run_command (client ,command ,on_output =None ,chunk_size =32768 ):
+    """
+    Run command on a fresh channel and return its exit status as soon as the channel closes.
+    stdout and stderr are merged; on_output receives complete lines as they arrive.
+    """
+    if hasattr (client ,'open_session'):
+        chan =client .open_session ()
+    else :
+        chan =client .get_transport ().open_session ()
+    try :
+        chan .set_combine_stderr (True )
+        chan .exec_command (command )
+        pending =b''
+        while True :
+        # blocks on the channel buffer until data or eof, no polling
+            data =chan .recv (chunk_size )
+            if not data :
+                break 
+            if on_output is None :
+                continue 
+            pending +=data 
+            cut =pending .rfind (b'\n')
+            if cut >=0 :
+                on_output (pending [:cut ].decode ('utf-8',errors ='ignore'))
+                pending =pending [cut +1 :]
+        if pending and on_output is not None :
+            on_output (pending .decode ('utf-8',errors ='ignore').rstrip ('\n'))
+        return chan .recv_exit_status ()
+    finally :
+        try :
+            chan .close ()
+        except Exception :
+            pass 
@@ -0,0 +1,69 @@
+import random 
+import struct 
+import unittest 
+import zlib 
+
+import cgbi 
+
+
+def _make_cgbi (width ,height ,filters ,opaque =False ,seed =1 ):
+    """
+    A CgBI png of random premultiplied BGRA pixels, rows filtered with filters in turn.
+    Returns (png bytes, the BGRA pixels).
+    """
+    rnd =random .Random (seed )
+    px =bytearray ()
+    for _ in range (width *height ):
+        a =255 if opaque else rnd .choice ([0 ,128 ,255 ,rnd .randrange (256 )])
+        px +=bytes ((rnd .randrange (256 )*a +127 )//255 for _ in range (3 ))+bytes ([a ])
+    stride =width *4 
+    raw =bytearray ()
+    prev =bytearray (stride )
+    for y in range (height ):
+        row =px [y *stride :(y +1 )*stride ]
+        ftype =filters [y %len (filters )]
+        out =bytearray (stride )
+        for i in range (stride ):
+            left =row [i -4 ]if i >=4 else 0 
+            upleft =prev [i -4 ]if i >=4 else 0 
+            pred =(0 ,left ,prev [i ],(left +prev [i ])>>1 ,cgbi ._paeth (left ,prev [i ],upleft ))[ftype ]
+            out [i ]=(row [i ]-pred )&0xff 
+        raw +=bytes ([ftype ])+out 
+        prev =row 
+    co =zlib .compressobj (9 ,zlib .DEFLATED ,-15 )
+    body =co .compress (bytes (raw ))+co .flush ()
+
+    def chunk (ctype ,data ):
+        return struct .pack ('>I',len (data ))+ctype +data +struct .pack ('>I',zlib .crc32 (ctype +data )&0xffffffff )
+    return (cgbi .PNG_SIGNATURE +chunk (b'CgBI',b'\x50\x00\x20\x06')+
+    chunk (b'IHDR',struct .pack ('>IIBBBBB',width ,height ,8 ,6 ,0 ,0 ,0 ))+
+    chunk (b'IDAT',body )+chunk (b'IEND',b'')),bytes (px )
+
+
+class UnfilterTest (unittest .TestCase ):
+
+    def _decode_py (self ,data ):
+        np ,cgbi .np =cgbi .np ,None 
+        try :
+            return cgbi .decode (data )
+        finally :
+            cgbi .np =np 
+
+    @unittest .skipIf (cgbi .np is None ,"numpy not installed")
+    def test_numpy_matches_pure_python (self ):
+        for filters in ([3 ],[4 ],[0 ,1 ,2 ,3 ,4 ]):
+            data ,_ =_make_cgbi (37 ,21 ,filters )
+            self .assertEqual (cgbi .decode (data ),self ._decode_py (data ),filters )
+
+    def test_average_and_paeth_round_trip (self ):
+    # opaque pixels: premultiplying changes nothing, so decode gives back the pixels as RGBA
+        for filters in ([3 ],[4 ]):
+            data ,bgra =_make_cgbi (9 ,7 ,filters ,opaque =True )
+            rgba =bytearray (bgra )
+            rgba [0 ::4 ],rgba [2 ::4 ]=bgra [2 ::4 ],bgra [0 ::4 ]
+            self .assertEqual (cgbi .decode (data ),(9 ,7 ,bytes (rgba )),filters )
+            self .assertEqual (self ._decode_py (data ),(9 ,7 ,bytes (rgba )),filters )
+
+
+if __name__ =='__main__':
+    unittest .main ()
@@ -0,0 +1,358 @@
+import os 
+import posixpath 
+import threading 
+import time 
+
+import tkinter as tk 
+from tkinter import ttk 
+
+from sftp_transfer import COPY_CHUNK ,TransferCancelled ,format_rate ,resumable_put 
+from ui_dispatch import UIDispatcher 
+
+
+class TransferItem :
+    """One queued upload ('up') or download ('down')."""
+
+    _ids =0 
+
+    def __init__ (self ,kind ,local_path ,remote_path ,size =0 ):
+        TransferItem ._ids +=1 
+        self .id =f"t{TransferItem._ids}"
+        self .kind =kind 
+        self .local_path =local_path 
+        self .remote_path =remote_path 
+        self .size =size 
+        self .done =0 
+        self .state ='queued'# queued, running, done, failed, cancelled
+        self .error =None 
+        self .rate =None 
+        self .started =None 
+        self .finished =None 
+        self .cancel =threading .Event ()
+
+    @property 
+    def name (self ):
+        return posixpath .basename (self .remote_path )if self .kind =='down'else os .path .basename (self .local_path )
+
+
+class TransferQueue :
+    """
+    Runs TransferItems on a pool of worker threads, each with its own sftp session on the shared
+    transport. pause() holds every worker between chunks; cancel/retry work per item.
+    on_change(item) is called from the workers, on_idle() when the queue drains.
+    """
+
+    def __init__ (self ,get_client ,workers =4 ,on_change =None ,on_idle =None ):
+        self .get_client =get_client 
+        self .workers =workers 
+        self .on_change =on_change 
+        self .on_idle =on_idle 
+        self .items =[]
+        self ._lock =threading .Lock ()
+        self ._running =threading .Event ()
+        self ._running .set ()
+        self ._threads =[]
+        self ._busy =0 
+
+    def add (self ,items ):
+        with self ._lock :
+            self .items .extend (items )
+            self ._spawn ()
+        for it in items :
+            self ._changed (it )
+
+    def _spawn (self ):
+    # under _lock: a worker leaves _threads in the same critical section where it finds nothing queued,
+    # so every thread counted here will still look at the queue again
+        want =max (1 ,int (self .workers or 1 ))
+        queued =sum (1 for it in self .items if it .state =='queued')
+        for _ in range (min (want -len (self ._threads ),queued )):
+            t =threading .Thread (target =self ._worker ,daemon =True )
+            self ._threads .append (t )
+            t .start ()
+
+    def pause (self ):
+        self ._running .clear ()
+
+    def resume (self ):
+        self ._running .set ()
+
+    @property 
+    def paused (self ):
+        return not self ._running .is_set ()
+
+    def cancel (self ,ids =None ):
+        dropped =[]
+        with self ._lock :
+            for it in self .items :
+                if (ids is None or it .id in ids )and it .state in ('queued','running'):
+                    it .cancel .set ()
+                    if it .state =='queued':
+                        it .state ='cancelled'
+                        dropped .append (it )
+        for it in dropped :
+            self ._changed (it )
+
+    def retry (self ,ids =None ):
+        again =[]
+        with self ._lock :
+            for it in self .items :
+                if (ids is None or it .id in ids )and it .state in ('failed','cancelled'):
+                    it .state ='queued'
+                    it .error =None 
+                    it .done =0 
+                    it .rate =None 
+                    it .cancel =threading .Event ()
+                    again .append (it )
+            if again :
+                self .items =[it for it in self .items if it not in again ]+again 
+                self ._spawn ()
+        for it in again :
+            self ._changed (it )
+
+    def clear_finished (self ):
+        with self ._lock :
+            gone =[it for it in self .items if it .state in ('done','cancelled')]
+            self .items =[it for it in self .items if it not in gone ]
+        return gone 
+
+    def totals (self ):
+        """(items done, items total, bytes done, bytes total, summed rate of running items)."""
+        items =list (self .items )
+        active =[it for it in items if it .state !='cancelled']
+        rate =sum (it .rate or 0 for it in items if it .state =='running')
+        return (sum (1 for it in active if it .state =='done'),len (active ),
+        sum (it .done for it in active ),sum (it .size for it in active ),rate )
+
+    def _changed (self ,item ):
+        if self .on_change :
+            try :
+                self .on_change (item )
+            except Exception :
+                pass 
+
+    def _next (self ):
+        """The next queued item, or None after taking this worker out of _threads."""
+        with self ._lock :
+            for it in self .items :
+                if it .state =='queued':
+                    it .state ='running'
+                    self ._busy +=1 
+                    return it 
+            self ._leave ()
+        return None 
+
+    def _leave (self ):
+        me =threading .current_thread ()
+        if me in self ._threads :
+            self ._threads .remove (me )
+
+    def _worker (self ):
+        client =None 
+        sftp =None 
+        try :
+            while True :
+                self ._running .wait ()
+                item =self ._next ()
+                if item is None :
+                    return 
+                try :
+                    if sftp is None :
+                        client =self .get_client ()
+                        sftp =client .open_sftp ()
+                    self ._run (client ,sftp ,item )
+                    item .state ='done'
+                except TransferCancelled :
+                    item .state ='cancelled'
+                except Exception as ex :
+                    item .state ='failed'
+                    item .error =str (ex )
+                    # the session may be what broke: start the next item on a fresh one
+                    try :
+                        sftp .close ()
+                    except Exception :
+                        pass 
+                    sftp =None 
+                finally :
+                    item .finished =time .monotonic ()
+                    with self ._lock :
+                        self ._busy -=1 
+                        idle =self ._busy ==0 and not any (it .state =='queued'for it in self .items )
+                    self ._changed (item )
+                if idle and self .on_idle :
+                    self .on_idle ()
+        finally :
+        # normally done by _next already; this covers a worker that died on an error
+            with self ._lock :
+                self ._leave ()
+            if sftp is not None :
+                try :
+                    sftp .close ()
+                except Exception :
+                    pass 
+
+    def _progress (self ,item ):
+        last ={'t':time .monotonic (),'n':0 }
+
+        def on_bytes (done ,total ):
+            if item .cancel .is_set ():
+                raise TransferCancelled (item .name )
+            if not self ._running .is_set ():
+                self ._running .wait ()
+                last ['t']=time .monotonic ()
+                last ['n']=done 
+            item .done =done 
+            item .size =total 
+            now =time .monotonic ()
+            if now -last ['t']>=0.5 :
+                inst =(done -last ['n'])/(now -last ['t'])
+                item .rate =inst if item .rate is None else 0.3 *inst +0.7 *item .rate 
+                last ['t']=now 
+                last ['n']=done 
+                self ._changed (item )
+        return on_bytes 
+
+    def _run (self ,client ,sftp ,item ):
+        item .started =time .monotonic ()
+        self ._changed (item )
+        progress =self ._progress (item )
+        if item .kind =='up':
+            item .size =os .path .getsize (item .local_path )
+            resumable_put (client ,item .local_path ,item .remote_path ,progress =progress ,retries =2 ,sftp =sftp )
+            return 
+        st =sftp .stat (item .remote_path )
+        item .size =st .st_size or 0 
+        part =item .local_path +'.part'
+        try :
+            with sftp .open (item .remote_path ,'rb')as src ,open (part ,'wb')as dst :
+            # read-ahead keeps many requests in flight instead of one round trip per chunk
+                src .prefetch (item .size )
+                done =0 
+                while True :
+                    buf =src .read (COPY_CHUNK )
+                    if not buf :
+                        break 
+                    dst .write (buf )
+                    done +=len (buf )
+                    progress (done ,item .size )
+            os .replace (part ,item .local_path )
+        except BaseException :
+            try :
+                os .remove (part )
+            except OSError :
+                pass 
+            raise 
+        if st .st_mtime :
+            os .utime (item .local_path ,(st .st_atime or st .st_mtime ,st .st_mtime ))
+
+
+class TransferQueueFrame (ttk .LabelFrame ):
+    """Queue panel: one row per transfer with progress and rate, pause/cancel/retry buttons."""
+
+    def __init__ (self ,parent ,get_connection ,workers_var =None ,dispatcher =None ,on_idle =None ,on_progress =None ):
+        super ().__init__ (parent ,text ="Transfers")
+        self ._ui =dispatcher or UIDispatcher (self )
+        # on_progress(bytes done, bytes total) on the Tk thread after each redraw
+        self .on_progress =on_progress 
+        self .workers_var =workers_var or tk .IntVar (value =4 )
+        self .queue =TransferQueue (get_connection ,workers =self ._workers (),on_change =self ._on_change ,
+        on_idle =on_idle )
+        self .summary_var =tk .StringVar (value ="Idle")
+        self ._dirty =set ()
+        self ._dirty_lock =threading .Lock ()
+        self ._build_ui ()
+
+    def _build_ui (self ):
+        bar =ttk .Frame (self )
+        bar .pack (fill =tk .X ,padx =4 ,pady =2 )
+        self .pause_btn =ttk .Button (bar ,text ="Pause",command =self ._toggle_pause )
+        self .pause_btn .pack (side =tk .LEFT ,padx =2 )
+        ttk .Button (bar ,text ="Cancel",command =lambda :self .queue .cancel (self ._selected_ids ())).pack (side =tk .LEFT ,padx =2 )
+        ttk .Button (bar ,text ="Retry",command =lambda :self .queue .retry (self ._selected_ids ())).pack (side =tk .LEFT ,padx =2 )
+        ttk .Button (bar ,text ="Clear finished",command =self ._clear_finished ).pack (side =tk .LEFT ,padx =2 )
+        ttk .Label (bar ,textvariable =self .summary_var ).pack (side =tk .LEFT ,padx =8 )
+
+        cols =("dir","name","size","progress","rate","state")
+        self .tree =ttk .Treeview (self ,columns =cols ,show ='headings',height =5 )
+        for col ,text ,width ,anchor in (("dir","",30 ,tk .CENTER ),("name","File",260 ,tk .W ),
+        ("size","Size",80 ,tk .E ),("progress","Progress",70 ,tk .E ),
+        ("rate","Rate",90 ,tk .E ),("state","State",200 ,tk .W )):
+            self .tree .heading (col ,text =text )
+            self .tree .column (col ,width =width ,anchor =anchor ,stretch =(col in ("name","state")))
+        self .tree .pack (side =tk .LEFT ,fill =tk .BOTH ,expand =True ,padx =4 ,pady =2 )
+        sb =ttk .Scrollbar (self ,orient =tk .VERTICAL ,command =self .tree .yview )
+        self .tree .configure (yscroll =sb .set )
+        sb .pack (side =tk .LEFT ,fill =tk .Y )
+
+    def _workers (self ):
+        try :
+            return max (1 ,min (16 ,int (self .workers_var .get ())))
+        except Exception :
+            return 4 
+
+    def enqueue (self ,items ):
+        """Queue TransferItems (any thread)."""
+        self .queue .workers =self ._ui .ask (self ._workers )
+        self .queue .add (items )
+
+    def _selected_ids (self ):
+        sel =self .tree .selection ()
+        return set (sel )if sel else None 
+
+    def _toggle_pause (self ):
+        if self .queue .paused :
+            self .queue .resume ()
+            self .pause_btn .configure (text ="Pause")
+        else :
+            self .queue .pause ()
+            self .pause_btn .configure (text ="Resume")
+        self ._refresh ()
+
+    def _clear_finished (self ):
+        for it in self .queue .clear_finished ():
+            if self .tree .exists (it .id ):
+                self .tree .delete (it .id )
+        self ._refresh ()
+
+    def _on_change (self ,item ):
+    # workers only mark rows dirty; the rows are redrawn at most once per dispatcher tick
+        with self ._dirty_lock :
+            self ._dirty .add (item )
+        self ._ui .coalesce (('transfer-queue',id (self )),self ._refresh )
+
+    def _refresh (self ):
+        with self ._dirty_lock :
+            dirty ,self ._dirty =self ._dirty ,set ()
+        for it in dirty :
+            pct =f"{it.done * 100.0 / it.size:.0f}%"if it .size else ("100%"if it .state =='done'else "")
+            rate =""
+            if it .state =='running':
+                rate =format_rate (it .rate )
+            elif it .state =='done'and it .started and it .finished and it .finished >it .started :
+                rate =format_rate (it .size /(it .finished -it .started ))
+            state =f"failed: {it.error}"if it .state =='failed'else it .state 
+            values =("↑"if it .kind =='up'else "↓",it .name ,_human (it .size ),pct ,rate ,state )
+            if self .tree .exists (it .id ):
+                self .tree .item (it .id ,values =values )
+            elif it in self .queue .items :
+                self .tree .insert ('',tk .END ,iid =it .id ,values =values )
+        done ,total ,nbytes ,total_bytes ,rate =self .queue .totals ()
+        if not total :
+            self .summary_var .set ("Idle")
+            return 
+        text =f"{done}/{total} files, {_human(nbytes)} of {_human(total_bytes)}"
+        if rate :
+            text +=f", {format_rate(rate)}"
+        if self .queue .paused :
+            text +=" (paused)"
+        self .summary_var .set (text )
+        if self .on_progress :
+            self .on_progress (nbytes ,total_bytes )
+
+
+def _human (n ):
+    n =float (n or 0 )
+    for unit in ("B","KB","MB","GB"):
+        if n <1024 or unit =="GB":
+            return f"{n:.0f} {unit}"if unit =="B"else f"{n:.1f} {unit}"
+        n /=1024 
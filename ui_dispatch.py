@@ -0,0 +1,188 @@
+import collections 
+import threading 
+
+import tkinter as tk 
+
+
+def classify_line (line ):
+    """Tag for one output line (dir, exec, app, path, warn, error) or None, same heuristics as the old per-line colorizer."""
+    stripped =line .strip ()
+    # ls -l style: permission char first
+    if stripped [:1 ]in ('d','-','l')and len (stripped )>10 and ' 'in stripped :
+        parts =stripped .split ()
+        name =parts [-1 ]if parts else stripped 
+        if stripped .startswith ('d')or name .endswith ('/'):
+            return 'dir'
+        if 'x'in parts [0 ]:
+            return 'exec'
+    if stripped .endswith ('/'):
+        return 'dir'
+    if '/Applications'in stripped or ' Applications'in stripped or stripped .endswith ('.app')or '.app/'in stripped :
+        return 'app'
+    if '/'in stripped or '\\'in stripped :
+        return 'path'
+    low =stripped .lower ()
+    if low .startswith ('warning')or ' warn 'in f' {low} ':
+        return 'warn'
+    if low .startswith ('error')or ' failed'in low or ' not found'in low :
+        return 'error'
+    return None 
+
+
+class LogSink :
+    """
+    Buffered writer for a read-only Text widget.
+    write() may be called from any thread: it only appends to a deque. The Tk thread drains the
+    deque every interval ms, classifies the lines and inserts one string per run of equal tags in
+    a single insert call, then trims the widget to max_lines.
+    """
+
+    def __init__ (self ,widget ,interval =50 ,max_lines =5000 ):
+        self .widget =widget 
+        self .interval =interval 
+        self .max_lines =max_lines 
+        self ._pending =collections .deque ()
+        self ._job =widget .after (interval ,self ._drain )
+
+    def write (self ,text ):
+        self ._pending .append (str (text ))
+
+    def clear (self ):
+        self ._pending .clear ()
+        self .widget .configure (state =tk .NORMAL )
+        try :
+            self .widget .delete ("1.0",tk .END )
+        finally :
+            self .widget .configure (state =tk .DISABLED )
+
+    def _take (self ):
+        lines =[]
+        while True :
+            try :
+                text =self ._pending .popleft ()
+            except IndexError :
+                break 
+            lines .extend (text .splitlines ()or [""])
+            # anything older than max_lines would be trimmed right away
+        if self .max_lines and len (lines )>self .max_lines :
+            lines =lines [-self .max_lines :]
+        return lines 
+
+    def _drain (self ):
+        try :
+            lines =self ._take ()
+            if lines :
+                self ._insert (lines )
+        except tk .TclError :
+        # widget destroyed: stop the pump
+            self ._job =None 
+            return 
+        except Exception :
+            pass 
+        self ._job =self .widget .after (self .interval ,self ._drain )
+
+    def _insert (self ,lines ):
+        args =[]
+        run =[]
+        tag =None 
+        for line in lines :
+            t =classify_line (line )
+            if run and t !=tag :
+                args .extend (("\n".join (run )+"\n",(tag ,)if tag else ()))
+                run =[]
+            tag =t 
+            run .append (line )
+        args .extend (("\n".join (run )+"\n",(tag ,)if tag else ()))
+        w =self .widget 
+        # only follow the output when the user hasn't scrolled up
+        follow =w .yview ()[1 ]>=0.999 
+        w .configure (state =tk .NORMAL )
+        try :
+            w .insert (tk .END ,*args )
+            if self .max_lines :
+                extra =int (w .index ('end-1c').split ('.')[0 ])-1 -self .max_lines 
+                if extra >0 :
+                    w .delete ("1.0",f"{extra + 1}.0")
+        finally :
+            w .configure (state =tk .DISABLED )
+        if follow :
+            w .see (tk .END )
+
+
+class UIDispatcher :
+    """
+    Hands work from worker threads to the Tk thread.
+    call() queues a callable, run in order by an after() pump every interval ms; coalesce()/set()
+    keep only the latest value per key, so a fast progress loop costs one update per tick.
+    Both run immediately when already on the Tk thread. ask() waits for the result (dialogs).
+    """
+
+    def __init__ (self ,root ,interval =30 ):
+        self .root =root 
+        self .interval =interval 
+        self ._ui_thread =threading .get_ident ()
+        self ._calls =collections .deque ()
+        self ._latest ={}
+        self ._lock =threading .Lock ()
+        self ._job =root .after (interval ,self ._pump )
+
+    def on_ui_thread (self ):
+        return threading .get_ident ()==self ._ui_thread 
+
+    def call (self ,fn ,*args ,**kwargs ):
+        if self .on_ui_thread ():
+            return fn (*args ,**kwargs )
+        self ._calls .append ((fn ,args ,kwargs ))
+
+    def coalesce (self ,key ,fn ,*args ):
+        if self .on_ui_thread ():
+            with self ._lock :
+                self ._latest .pop (key ,None )
+            return fn (*args )
+        with self ._lock :
+            self ._latest [key ]=(fn ,args )
+
+    def set (self ,var ,value ):
+        """Coalesced Variable.set."""
+        self .coalesce (('var',str (var )),var .set ,value )
+
+    def ask (self ,fn ,*args ,**kwargs ):
+        """Run fn on the Tk thread and return its result; blocks the calling worker until then."""
+        if self .on_ui_thread ():
+            return fn (*args ,**kwargs )
+        done =threading .Event ()
+        box ={}
+
+        def run ():
+            try :
+                box ['value']=fn (*args ,**kwargs )
+            except Exception as ex :
+                box ['error']=ex 
+            finally :
+                done .set ()
+        self ._calls .append ((run ,(),{}))
+        done .wait ()
+        if 'error'in box :
+            raise box ['error']
+        return box .get ('value')
+
+    def _pump (self ):
+    # only what is queued now: callables that queue more run next tick
+        for _ in range (len (self ._calls )):
+            fn ,args ,kwargs =self ._calls .popleft ()
+            try :
+                fn (*args ,**kwargs )
+            except Exception :
+                pass 
+        with self ._lock :
+            latest ,self ._latest =self ._latest ,{}
+        for fn ,args in latest .values ():
+            try :
+                fn (*args )
+            except Exception :
+                pass 
+        try :
+            self ._job =self .root .after (self .interval ,self ._pump )
+        except tk .TclError :
+        # root destroyed
+            self ._job =None 